@@ -6,6 +6,56 @@ class Settings(BaseSettings):
     neo4j_uri: str = "bolt://localhost:7687"
     neo4j_user: str = "neo4j"
     neo4j_password: str = "bimoi_dev_password"
+    neo4j_max_pool_size: int = 100
+    # Connections opened (and statements EXPLAINed across) during warm-up
+    neo4j_pool_min_size: int = 10
+    
+    # Readiness probe results are reused for this long
+    health_cache_seconds: float = 5.0
+    # GraphQL requests faster than this count as "fast" for startup reporting
+    fast_request_ms: float = 100.0
+    
+    # Multi-owner graphs: each request is scoped to the owner in this header.
+    # The header is not authenticated, so it is only honored when a trusted
+    # proxy sets it (and strips any client-supplied value).
+    owner_header: str = "X-Bimoi-Owner"
+    trust_owner_header: bool = False
+    default_owner: str = "default"
+    
+    # Write-behind coalescing of updatePerson/updateConnection (0 disables)
+    write_coalesce_window_ms: int = 0
+    write_coalesce_max_batch: int = 500
+    
+    # Most-trusted neighbors kept per node when sampling the visualization graph
+    graph_sample_size: int = 50
+    # Largest sample a client may request (depth 2 returns up to 1 + s + s^2 people)
+    graph_max_sample_size: int = 100
+    
+    # Bulk deletion: people per chunk, rows per inner transaction
+    delete_chunk_size: int = 500
+    delete_batch_size: int = 1000
+    
+    # Precomputed graph layouts kept in memory (per owner, depth and sample)
+    layout_cache_size: int = 256
+    # Wall-clock cap per layout computation; positions so far are returned
+    layout_time_budget_ms: int = 5000
+    # Larger graphs are returned without positions (about 65 ms per iteration at 5k)
+    layout_max_nodes: int = 5000
+    
+    # Cached "people you may know" results (per owner and person). The TTL
+    # bounds staleness from writes this process doesn't see (other workers, CLIs).
+    suggestion_cache_size: int = 1024
+    suggestion_cache_ttl_seconds: int = 60
+    
+    # Admission control: concurrent operations and queued waiters per lane.
+    # Keep heavy_concurrency well below neo4j_max_pool_size.
+    heavy_concurrency: int = 8
+    heavy_queue_size: int = 32
+    light_concurrency: int = 64
+    light_queue_size: int = 256
+    
+    # Root directory for `python -m app.snapshot` output
+    snapshot_dir: str = "snapshots"
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,193 @@
+import asyncio
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Hashable, Optional, Union
+
+from fastapi import HTTPException, Request
+from graphql import ExecutionResult as GraphQLExecutionResult, FieldNode, GraphQLError, get_operation_ast
+from neo4j import AsyncSession, AsyncTransaction
+from strawberry.extensions import SchemaExtension
+from strawberry.fastapi import BaseContext
+from strawberry.types.graphql import OperationType
+
+from .config import get_settings
+from .database import get_driver, get_session
+from .services.scheduler import Overloaded, get_scheduler
+
+# Set while a read runs as a flight other requests may join. It then uses its
+# own session, so joiners never wait behind this request's other fields.
+_shared_flight: ContextVar[bool] = ContextVar("shared_flight", default=False)
+
+
+class RequestContext(BaseContext):
+    """Per-request GraphQL context carrying the graph owner.
+
+    Also owns the request's Neo4j session, opened on first use and shared by
+    the resolvers of the operation (except reads other requests may join),
+    and a memo of lookups (such as the current user) that resolvers would
+    otherwise repeat. Within a mutation
+    operation of several fields the session is wrapped in one write
+    transaction, committed by ``RequestScope`` once every field has run.
+    """
+
+    def __init__(self, owner: str):
+        super().__init__()
+        self.owner = owner
+        self.memo: dict[Any, asyncio.Future] = {}
+        # Owner data version the memo was filled at
+        self._memo_version = 0
+        self.transactional = False
+        self._session: Optional[AsyncSession] = None
+        self._transaction: Optional[AsyncTransaction] = None
+        self._after_commit: list[Callable[[], None]] = []
+        # One admitted call per lane at a time for the whole request
+        self._lanes: dict[str, asyncio.Lock] = {}
+        # Resolvers run concurrently, but a session runs one query at a time
+        self._lock = asyncio.Lock()
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[Union[AsyncSession, AsyncTransaction]]:
+        """Use the shared session, or its write transaction during a mutation."""
+        if _shared_flight.get():
+            async with get_session() as session:
+                yield session
+            return
+        async with self._lock:
+            if self._session is None:
+                self._session = get_driver().session()
+            if not self.transactional:
+                yield self._session
+                return
+            if self._transaction is None:
+                self._transaction = await self._session.begin_transaction()
+            yield self._transaction
+
+    async def memoized(self, key: Any, load: Callable[[], Awaitable[Any]]) -> Any:
+        """Return ``load()``, running it at most once per key in this request."""
+        version = get_scheduler().version(self.owner)
+        if version != self._memo_version:
+            # Lookups made before a write must not feed reads after it
+            self.memo.clear()
+            self._memo_version = version
+        if key not in self.memo:
+            self.memo[key] = asyncio.ensure_future(load())
+        return await self.memo[key]
+
+    async def schedule(
+        self,
+        lane: str,
+        call: Callable[[], Awaitable[Any]],
+        key: Optional[Hashable] = None
+    ) -> Any:
+        """Run a service call through admission control.
+
+        Reads with a ``key`` may join an identical in-flight call; writes and
+        anything inside a mutation's transaction never do. The fields of one
+        request take turns on a single slot per lane, so one request with many
+        aliased fields cannot occupy a whole lane. A full queue fails the
+        request with 503 and ``Retry-After``.
+        """
+        key = None if self.transactional else key
+        try:
+            async with self._lanes.setdefault(lane, asyncio.Lock()):
+                token = _shared_flight.set(key is not None)
+                try:
+                    return await get_scheduler().run(lane, self.owner, call, key=key)
+                finally:
+                    _shared_flight.reset(token)
+        except Overloaded as e:
+            if self.response is not None:
+                self.response.status_code = 503
+                self.response.headers["Retry-After"] = str(e.retry_after)
+            raise
+
+    def after_commit(self, callback: Callable[[], None]):
+        """Run ``callback`` once this request's writes are visible to others."""
+        if self.transactional:
+            self._after_commit.append(callback)
+        else:
+            callback()
+
+    async def commit(self):
+        """Commit the request's write transaction, if one was opened."""
+        transaction, self._transaction = self._transaction, None
+        if transaction is not None:
+            await transaction.commit()
+        callbacks, self._after_commit = self._after_commit, []
+        for callback in callbacks:
+            callback()
+
+    async def close(self):
+        """Roll back anything uncommitted and return the session to the pool."""
+        transaction, self._transaction = self._transaction, None
+        session, self._session = self._session, None
+        try:
+            if transaction is not None:
+                await transaction.rollback()
+        finally:
+            if session is not None:
+                await session.close()
+
+
+class RequestScope(SchemaExtension):
+    """Bind the request session's lifetime to one GraphQL operation.
+
+    The fields of a multi-field mutation run in a single write transaction
+    that commits only if every field succeeded; otherwise it is rolled back
+    and no data is returned, since none of it was persisted. A mutation with
+    one field has nothing to share a transaction with, so its service call
+    manages its own transactions (and may batch or coalesce writes).
+    """
+
+    async def on_execute(self):
+        context = self.execution_context.context
+        context.transactional = (
+            self.execution_context.operation_type == OperationType.MUTATION
+            and not self._single_field()
+        )
+        yield
+        if not context.transactional:
+            return
+        result = self.execution_context.result
+        errors = result.errors if result is not None else None
+        if not errors:
+            try:
+                await context.commit()
+            except Exception as e:
+                errors = [GraphQLError(f"Failed to commit mutations: {e}", original_error=e)]
+        if errors:
+            # The transaction is rolled back when the operation closes
+            self.execution_context.result = GraphQLExecutionResult(data=None, errors=errors)
+            self.execution_context.errors = errors
+
+    def _single_field(self) -> bool:
+        """Whether the operation selects exactly one root field."""
+        operation = get_operation_ast(
+            self.execution_context.graphql_document, self.execution_context.operation_name
+        )
+        selections = operation.selection_set.selections if operation else ()
+        # Fragments at the root may select any number of fields
+        return len(selections) == 1 and isinstance(selections[0], FieldNode)
+
+    async def on_operation(self):
+        yield
+        await self.execution_context.context.close()
+
+
+async def get_context(request: Request) -> RequestContext:
+    """Build the GraphQL context for a request.
+
+    The owner header carries no credentials, so it is only honored with
+    ``trust_owner_header``, i.e. behind a proxy that authenticates the caller,
+    sets the header and strips any client-supplied one. Otherwise every
+    request uses the default owner and a client-supplied header is rejected
+    rather than silently ignored.
+    """
+    settings = get_settings()
+    owner = request.headers.get(settings.owner_header)
+    if owner and not settings.trust_owner_header:
+        raise HTTPException(
+            status_code=403,
+            detail=f"{settings.owner_header} is only accepted from a trusted proxy"
+        )
+    return RequestContext(owner=owner or settings.default_owner)
@@ -1,38 +1,130 @@
-from neo4j import GraphDatabase, AsyncGraphDatabase
+import asyncio
+from neo4j import AsyncDriver, AsyncGraphDatabase
+from neo4j.exceptions import Neo4jError
 from contextlib import asynccontextmanager
-from typing import AsyncGenerator
+from dataclasses import dataclass
+from typing import AsyncGenerator, Optional
 from .config import get_settings
 
 settings = get_settings()
 
-# Async driver for Neo4j
-driver = AsyncGraphDatabase.driver(
-    settings.neo4j_uri,
-    auth=(settings.neo4j_user, settings.neo4j_password)
-)
+# Async driver for Neo4j, created on first use so importing the app is cheap
+_driver: Optional[AsyncDriver] = None
+
+SCHEMA_STATEMENTS = [
+    "CREATE INDEX person_owner IF NOT EXISTS FOR (p:Person) ON (p.owner)",
+    "CREATE INDEX person_owner_id IF NOT EXISTS FOR (p:Person) ON (p.owner, p.id)",
+    "CREATE INDEX person_owner_is_user IF NOT EXISTS FOR (p:Person) ON (p.owner, p.is_user)",
+    "CREATE INDEX person_owner_community IF NOT EXISTS FOR (p:Person) ON (p.owner, p.community)",
+    "CREATE INDEX knows_owner_id IF NOT EXISTS FOR ()-[r:KNOWS]-() ON (r.owner, r.id)",
+    "CREATE INDEX knows_owner_since IF NOT EXISTS FOR ()-[r:KNOWS]-() ON (r.owner, r.since)",
+]
+
+# Every service statement with sample parameters, used to prime the plan cache
+PREPARED_STATEMENTS: list[tuple[str, dict]] = []
+
+
+def cypher(query: str, nullable: tuple[str, ...] = (), **sample_params) -> str:
+    """Register a service statement for plan-cache warm-up and return it.
+
+    Plans are cached per parameter types, so statements whose optional
+    parameters are usually sent as null (no cursor, no filter) list them in
+    ``nullable`` to also prime the variant with those parameters set to null.
+    """
+    PREPARED_STATEMENTS.append((query, sample_params))
+    if nullable:
+        PREPARED_STATEMENTS.append((query, {**sample_params, **dict.fromkeys(nullable)}))
+    return query
+
+
+def get_driver() -> AsyncDriver:
+    """Get the shared Neo4j driver, creating it on first use."""
+    global _driver
+    if _driver is None:
+        _driver = AsyncGraphDatabase.driver(
+            settings.neo4j_uri,
+            auth=(settings.neo4j_user, settings.neo4j_password),
+            max_connection_pool_size=settings.neo4j_max_pool_size
+        )
+    return _driver
 
 
 async def get_db():
     """Get an async Neo4j session."""
-    async with driver.session() as session:
+    async with get_driver().session() as session:
         yield session
 
 
 @asynccontextmanager
 async def get_session() -> AsyncGenerator:
     """Context manager for Neo4j session."""
-    async with driver.session() as session:
+    async with get_driver().session() as session:
         yield session
 
 
+async def ensure_schema():
+    """Create owner-scoped indexes.
+
+    Backfilling properties on legacy data is a one-off batched migration
+    (``python -m app.migrate``), not part of every start.
+    """
+    async with get_session() as session:
+        for statement in SCHEMA_STATEMENTS:
+            await session.run(statement)
+
+
+@dataclass
+class WarmUpStats:
+    primed: int = 0
+    failed: int = 0
+
+
+async def warm_up() -> WarmUpStats:
+    """Fill the connection pool and prime the plan cache.
+
+    Opens ``neo4j_pool_min_size`` sessions concurrently so that many pooled
+    connections exist before traffic arrives, and spreads an ``EXPLAIN`` of
+    every registered statement across them so the first real requests skip
+    Cypher planning. A statement Neo4j rejects is logged and skipped: it only
+    loses its head start, and must not keep the worker unready. Connection
+    errors still propagate.
+    """
+    statements = asyncio.Queue()
+    for statement in PREPARED_STATEMENTS:
+        statements.put_nowait(statement)
+    stats = WarmUpStats()
+
+    async def worker():
+        async with get_session() as session:
+            result = await session.run("RETURN 1")
+            await result.consume()
+            while not statements.empty():
+                query, params = statements.get_nowait()
+                try:
+                    result = await session.run("EXPLAIN " + query, **params)
+                    await result.consume()
+                except Neo4jError as e:
+                    stats.failed += 1
+                    first_line = next((line.strip() for line in query.splitlines() if line.strip()), "")
+                    print(f"✗ Could not prime `{first_line} ...`: {e.message}")
+                    continue
+                stats.primed += 1
+
+    await asyncio.gather(*[worker() for _ in range(max(settings.neo4j_pool_min_size, 1))])
+    return stats
+
+
 async def close_driver():
     """Close the Neo4j driver."""
-    await driver.close()
+    global _driver
+    if _driver is not None:
+        await _driver.close()
+        _driver = None
 
 
 async def verify_connection():
     """Verify the Neo4j connection is working."""
-    async with driver.session() as session:
+    async with get_session() as session:
         result = await session.run("RETURN 1 as n")
         record = await result.single()
         return record["n"] == 1
@@ -0,0 +1,92 @@
+"""
+Liveness/readiness state and startup timing for the API process.
+
+Liveness never touches Neo4j. Readiness is false until warm-up completes and
+afterwards reuses a recent connectivity check, so frequent probes do not each
+open a session and run a query.
+"""
+import asyncio
+import time
+from typing import Optional
+
+from .config import get_settings
+from .database import WarmUpStats, verify_connection, warm_up
+
+# Reference point for startup timings
+PROCESS_STARTED_AT = time.monotonic()
+
+
+class HealthMonitor:
+    """Tracks warm-up, cached readiness and time-to-first-fast-request."""
+
+    def __init__(self):
+        self.warmed_up = False
+        self.warm_up_ms: Optional[float] = None
+        self.statements_primed = 0
+        self.statements_failed = 0
+        self.first_fast_request_ms: Optional[float] = None
+        self._checked_at: Optional[float] = None
+        self._neo4j_ok = False
+        self._error: Optional[str] = None
+        # One probe refreshes (and, if needed, warms up) while the others wait
+        self._refresh_lock = asyncio.Lock()
+
+    def record_warm_up(self, started_at: float, stats: WarmUpStats):
+        self.warmed_up = True
+        self.warm_up_ms = (time.monotonic() - started_at) * 1000
+        self.statements_primed = stats.primed
+        self.statements_failed = stats.failed
+        self._checked_at = time.monotonic()
+        self._neo4j_ok = True
+
+    def record_request(self, duration_ms: float) -> bool:
+        """Record a request; return True if it was the first fast one."""
+        if self.first_fast_request_ms is not None:
+            return False
+        if duration_ms > get_settings().fast_request_ms:
+            return False
+        self.first_fast_request_ms = (time.monotonic() - PROCESS_STARTED_AT) * 1000
+        return True
+
+    def _is_stale(self) -> bool:
+        ttl = get_settings().health_cache_seconds
+        return self._checked_at is None or time.monotonic() - self._checked_at >= ttl
+
+    async def _refresh(self):
+        try:
+            self._neo4j_ok = await verify_connection()
+            self._error = None
+            if self._neo4j_ok and not self.warmed_up:
+                # Neo4j was unreachable at startup; warm up before serving
+                started_at = time.monotonic()
+                self.record_warm_up(started_at, await warm_up())
+        except Exception as e:
+            self._neo4j_ok = False
+            self._error = str(e)
+        self._checked_at = time.monotonic()
+
+    async def readiness(self) -> dict:
+        """Return readiness, re-checking Neo4j at most once per cache period."""
+        if self._is_stale():
+            async with self._refresh_lock:
+                # Another probe may have refreshed while this one waited
+                if self._is_stale():
+                    await self._refresh()
+
+        status = {
+            "status": "ready" if self._neo4j_ok and self.warmed_up else "unavailable",
+            "neo4j": self._neo4j_ok,
+            "warmed_up": self.warmed_up,
+            "startup": {
+                "warm_up_ms": self.warm_up_ms,
+                "statements_primed": self.statements_primed,
+                "statements_failed": self.statements_failed,
+                "first_fast_request_ms": self.first_fast_request_ms,
+            },
+        }
+        if self._error:
+            status["error"] = self._error
+        return status
+
+
+monitor = HealthMonitor()
@@ -1,25 +1,50 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from strawberry.fastapi import GraphQLRouter
 from contextlib import asynccontextmanager
+import time
 
 from .schema import schema
-from .database import close_driver, verify_connection
+from .context import get_context
+from .database import close_driver, ensure_schema, verify_connection, warm_up
+from .health import PROCESS_STARTED_AT, monitor
+from .services.scheduler import get_scheduler
+from .services.write_queue import get_write_coalescer
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    connected = False
     try:
         connected = await verify_connection()
         if connected:
             print("✓ Connected to Neo4j")
+            await ensure_schema()
+            print("✓ Neo4j indexes ready")
     except Exception as e:
         print(f"✗ Failed to connect to Neo4j: {e}")
+    if connected:
+        try:
+            started_at = time.monotonic()
+            stats = await warm_up()
+            monitor.record_warm_up(started_at, stats)
+            print(
+                f"✓ Warmed up in {monitor.warm_up_ms:.0f} ms "
+                f"({stats.primed} statements primed, {stats.failed} failed, "
+                f"{(time.monotonic() - PROCESS_STARTED_AT) * 1000:.0f} ms since start)"
+            )
+        except Exception as e:
+            # Readiness retries the warm-up on the next probe
+            print(f"✗ Warm-up failed: {e}")
     
     yield
     
     # Shutdown
+    coalescer = get_write_coalescer()
+    if coalescer:
+        await coalescer.drain()
     await close_driver()
     print("✓ Neo4j connection closed")
 
@@ -41,15 +66,47 @@ app.add_middleware(
 )
 
 # GraphQL endpoint
-graphql_app = GraphQLRouter(schema)
+graphql_app = GraphQLRouter(schema, context_getter=get_context)
 app.include_router(graphql_app, prefix="/graphql")
 
 
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    """Report how long after startup the first fast GraphQL request finished."""
+    started_at = time.monotonic()
+    response = await call_next(request)
+    # Requests shed by admission control (503) say nothing about warm-up
+    if request.url.path.startswith("/graphql") and response.status_code < 500:
+        duration_ms = (time.monotonic() - started_at) * 1000
+        if monitor.record_request(duration_ms):
+            print(
+                f"✓ First fast request after {monitor.first_fast_request_ms:.0f} ms "
+                f"({duration_ms:.1f} ms)"
+            )
+    return response
+
+
+@app.get("/health/live")
+async def liveness_check():
+    """Liveness probe: the process is up, without touching Neo4j."""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness probe: warmed up and Neo4j reachable (cached)."""
+    status = await monitor.readiness()
+    return JSONResponse(status, status_code=200 if status["status"] == "ready" else 503)
+
+
 @app.get("/health")
 async def health_check():
-    """Health check endpoint."""
-    try:
-        connected = await verify_connection()
-        return {"status": "healthy", "neo4j": connected}
-    except Exception as e:
-        return {"status": "unhealthy", "neo4j": False, "error": str(e)}
+    """Health check endpoint (healthy/unhealthy by Neo4j reachability, as before)."""
+    status = await monitor.readiness()
+    return {**status, "status": "healthy" if status["neo4j"] else "unhealthy"}
+
+
+@app.get("/metrics")
+async def metrics():
+    """Admission-control queue depths and counters per lane."""
+    return get_scheduler().metrics()
@@ -0,0 +1,80 @@
+"""
+One-off data migrations for graphs created by older versions.
+
+Each migration backfills a property in ``CALL { ... } IN TRANSACTIONS``
+batches, so large databases never build one huge transaction, and only
+touches rows that still need it, so an interrupted run is resumed by running
+it again. Run after upgrading, not on every start.
+
+Run with: python -m app.migrate [--batch-size N]
+"""
+import argparse
+import asyncio
+
+from .config import get_settings
+from .database import close_driver, get_session
+
+# Data created before multi-owner support belongs to the default owner
+BACKFILL_PERSON_OWNER = """
+    MATCH (p:Person) WHERE p.owner IS NULL
+    CALL {
+        WITH p
+        SET p.owner = $owner
+    } IN TRANSACTIONS OF $batch_size ROWS
+    RETURN count(*) as updated
+"""
+
+BACKFILL_KNOWS_OWNER = """
+    MATCH ()-[r:KNOWS]->() WHERE r.owner IS NULL
+    CALL {
+        WITH r
+        SET r.owner = $owner
+    } IN TRANSACTIONS OF $batch_size ROWS
+    RETURN count(*) as updated
+"""
+
+# The connection counter maintained by GraphService
+BACKFILL_DEGREE = """
+    MATCH (p:Person) WHERE p.degree IS NULL
+    CALL {
+        WITH p
+        SET p.degree = COUNT { (p)-[:KNOWS]-(:Person) }
+    } IN TRANSACTIONS OF $batch_size ROWS
+    RETURN count(*) as updated
+"""
+
+MIGRATIONS = [
+    ("person owner", BACKFILL_PERSON_OWNER),
+    ("relationship owner", BACKFILL_KNOWS_OWNER),
+    ("person degree", BACKFILL_DEGREE),
+]
+
+
+async def migrate(batch_size: int) -> dict[str, int]:
+    """Run every migration and return the rows each one updated."""
+    settings = get_settings()
+    updated = {}
+    # CALL { ... } IN TRANSACTIONS needs an auto-commit transaction
+    async with get_session() as session:
+        for name, statement in MIGRATIONS:
+            result = await session.run(
+                statement, owner=settings.default_owner, batch_size=batch_size
+            )
+            updated[name] = (await result.single())["updated"]
+            print(f"✓ Backfilled {name}: {updated[name]} rows", flush=True)
+    return updated
+
+
+async def main():
+    parser = argparse.ArgumentParser(prog="python -m app.migrate", description=__doc__.split("\n")[1])
+    parser.add_argument("--batch-size", type=int, default=get_settings().delete_batch_size)
+    args = parser.parse_args()
+
+    try:
+        await migrate(args.batch_size)
+    finally:
+        await close_driver()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
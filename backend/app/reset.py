@@ -0,0 +1,60 @@
+"""
+Remove an owner's graph (or every owner's graph) in bounded batches.
+
+Deletion runs through ``GraphService.clear``, which removes relationships and
+people with ``CALL { ... } IN TRANSACTIONS``. It reports progress as it goes
+and can be re-run to resume an interrupted reset.
+
+Run with: python -m app.reset [--owner OWNER | --all]
+"""
+import argparse
+import asyncio
+
+from .config import get_settings
+from .database import close_driver, get_session
+
+
+async def list_owners() -> list[str]:
+    """Return every owner that has at least one person."""
+    async with get_session() as session:
+        result = await session.run(
+            "MATCH (p:Person) WHERE p.owner IS NOT NULL RETURN DISTINCT p.owner as owner"
+        )
+        return [r["owner"] for r in await result.data()]
+
+
+def print_progress(owner: str):
+    def report(done: int, total: int):
+        print(f"  {owner}: deleted {done}/{total} people", flush=True)
+    return report
+
+
+async def reset(owners: list[str]) -> int:
+    """Clear each owner's graph, printing progress. Returns people deleted."""
+    # Imported here: the service imports the GraphQL schema, which imports it back
+    from .services.graph_service import GraphService
+
+    deleted = 0
+    for owner in owners:
+        deleted_for_owner = await GraphService(owner).clear(progress=print_progress(owner))
+        print(f"✓ Cleared {deleted_for_owner} people for owner '{owner}'")
+        deleted += deleted_for_owner
+    return deleted
+
+
+async def main():
+    parser = argparse.ArgumentParser(prog="python -m app.reset", description=__doc__.split("\n")[1])
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--owner", default=get_settings().default_owner)
+    group.add_argument("--all", action="store_true", help="clear every owner's graph")
+    args = parser.parse_args()
+
+    try:
+        owners = await list_owners() if args.all else [args.owner]
+        await reset(owners)
+    finally:
+        await close_driver()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
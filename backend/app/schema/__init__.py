@@ -1,5 +1,6 @@
 import strawberry
 from .queries import Query
 from .mutations import Mutation
+from ..context import RequestScope
 
-schema = strawberry.Schema(query=Query, mutation=Mutation)
+schema = strawberry.Schema(query=Query, mutation=Mutation, extensions=[RequestScope])
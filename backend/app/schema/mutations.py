@@ -1,58 +1,85 @@
 import strawberry
+from strawberry.types import Info
 from typing import Optional
 from .types import Person, Connection, PersonInput, ConnectionInput
 from ..services.graph_service import GraphService
+from ..services.scheduler import HEAVY, LIGHT
 
 
 @strawberry.type
 class Mutation:
     @strawberry.mutation
-    async def create_person(self, input: PersonInput) -> Person:
+    async def create_person(self, info: Info, input: PersonInput) -> Person:
         """Create a new person node."""
-        service = GraphService()
-        return await service.create_person(input)
+        service = GraphService(info.context.owner, info.context)
+        return await info.context.schedule(LIGHT, lambda: service.create_person(input))
     
     @strawberry.mutation
-    async def update_person(self, id: str, input: PersonInput) -> Person:
+    async def update_person(self, info: Info, id: str, input: PersonInput) -> Person:
         """Update an existing person."""
-        service = GraphService()
-        return await service.update_person(id, input)
+        service = GraphService(info.context.owner, info.context)
+        return await info.context.schedule(LIGHT, lambda: service.update_person(id, input))
     
     @strawberry.mutation
-    async def delete_person(self, id: str) -> bool:
+    async def delete_person(self, info: Info, id: str) -> bool:
         """Delete a person and all their relationships."""
-        service = GraphService()
-        return await service.delete_person(id)
+        service = GraphService(info.context.owner, info.context)
+        # Deleting a hub is a batched, long-running write
+        return await info.context.schedule(HEAVY, lambda: service.delete_person(id))
     
     @strawberry.mutation
-    async def set_as_me(self, id: str) -> Person:
+    async def delete_people(self, info: Info, ids: list[str]) -> int:
+        """Delete several people and their relationships in bounded batches."""
+        service = GraphService(info.context.owner, info.context)
+        return await info.context.schedule(HEAVY, lambda: service.delete_people(ids))
+    
+    @strawberry.mutation
+    async def merge_people(self, info: Info, keep_id: str, merge_id: str) -> Person:
+        """Merge a duplicate person into another, re-pointing their relationships."""
+        service = GraphService(info.context.owner, info.context)
+        # Copies every relationship of a possibly-hub person in one transaction
+        return await info.context.schedule(HEAVY, lambda: service.merge_people(keep_id, merge_id))
+    
+    @strawberry.mutation
+    async def set_as_me(self, info: Info, id: str) -> Person:
         """Set a person as the current user (graph owner)."""
-        service = GraphService()
-        return await service.set_as_user(id)
+        service = GraphService(info.context.owner, info.context)
+        return await info.context.schedule(LIGHT, lambda: service.set_as_user(id))
     
     @strawberry.mutation
     async def create_connection(
         self, 
+        info: Info,
         from_id: str, 
         to_id: str, 
         input: ConnectionInput
     ) -> Connection:
         """Create a KNOWS relationship between two people."""
-        service = GraphService()
-        return await service.create_connection(from_id, to_id, input)
+        service = GraphService(info.context.owner, info.context)
+        return await info.context.schedule(
+            LIGHT,
+            lambda: service.create_connection(from_id, to_id, input)
+        )
     
     @strawberry.mutation
     async def update_connection(
         self, 
+        info: Info,
         relationship_id: str, 
         input: ConnectionInput
     ) -> Connection:
         """Update an existing relationship."""
-        service = GraphService()
-        return await service.update_connection(relationship_id, input)
+        service = GraphService(info.context.owner, info.context)
+        return await info.context.schedule(
+            LIGHT,
+            lambda: service.update_connection(relationship_id, input)
+        )
     
     @strawberry.mutation
-    async def delete_connection(self, relationship_id: str) -> bool:
+    async def delete_connection(self, info: Info, relationship_id: str) -> bool:
         """Delete a relationship between two people."""
-        service = GraphService()
-        return await service.delete_connection(relationship_id)
+        service = GraphService(info.context.owner, info.context)
+        return await info.context.schedule(
+            LIGHT,
+            lambda: service.delete_connection(relationship_id)
+        )
@@ -1,31 +1,164 @@
 import strawberry
+from strawberry.types import Info
 from typing import Optional
-from .types import Person, GraphData
+from datetime import date
+from .types import (
+    Person, GraphData, ConnectionPage, SecondDegreePage, Community,
+    TimelineBucket, DuplicateCandidate, Suggestion
+)
+from ..config import get_settings
 from ..services.graph_service import GraphService
+from ..services.scheduler import HEAVY, LIGHT
+
+
+def _require_size(name: str, value: Optional[int], maximum: Optional[int] = None):
+    """Reject page and sample sizes that Cypher's LIMIT cannot take, or that
+    would make the traversal unbounded."""
+    if value is not None and value < 1:
+        raise ValueError(f"{name} must be at least 1")
+    if value is not None and maximum is not None and value > maximum:
+        raise ValueError(f"{name} must be at most {maximum}")
 
 
 @strawberry.type
 class Query:
     @strawberry.field
-    async def me(self) -> Optional[Person]:
+    async def me(self, info: Info) -> Optional[Person]:
         """Get the current user's person node."""
-        service = GraphService()
-        return await service.get_user()
+        service = GraphService(info.context.owner, info.context)
+        return await info.context.schedule(
+            LIGHT,
+            service.get_user,
+            key=("user",)
+        )
     
     @strawberry.field
-    async def person(self, id: str) -> Optional[Person]:
+    async def person(self, info: Info, id: str) -> Optional[Person]:
         """Get a specific person by ID."""
-        service = GraphService()
-        return await service.get_person(id)
+        service = GraphService(info.context.owner, info.context)
+        return await info.context.schedule(
+            LIGHT,
+            lambda: service.get_person(id),
+            key=("person", id)
+        )
+    
+    @strawberry.field
+    async def people(
+        self,
+        info: Info,
+        tags: Optional[list[str]] = None,
+        community: Optional[str] = None
+    ) -> list[Person]:
+        """Get all people, optionally filtered by tags and/or community."""
+        service = GraphService(info.context.owner, info.context)
+        return await info.context.schedule(
+            LIGHT,
+            lambda: service.get_people(tags, community),
+            key=("people", tuple(tags or ()), community)
+        )
+    
+    @strawberry.field
+    async def communities(self, info: Info, first: int = 20, members: int = 3) -> list[Community]:
+        """Get the largest communities with sizes and representative members."""
+        service = GraphService(info.context.owner, info.context)
+        return await info.context.schedule(
+            HEAVY,
+            lambda: service.get_communities(first, members),
+            key=("communities", first, members)
+        )
+    
+    @strawberry.field
+    async def connections(
+        self,
+        info: Info,
+        person_id: str,
+        first: int = 50,
+        after: Optional[str] = None,
+        min_trust: Optional[int] = None,
+        as_of: Optional[date] = None
+    ) -> ConnectionPage:
+        """Get a page of a person's connections, highest trust first."""
+        _require_size("first", first)
+        service = GraphService(info.context.owner, info.context)
+        return await info.context.schedule(
+            LIGHT,
+            lambda: service.get_connections(person_id, first, after, min_trust, as_of),
+            key=("connections", person_id, first, after, min_trust, as_of)
+        )
+    
+    @strawberry.field
+    async def second_degree_connections(
+        self,
+        info: Info,
+        person_id: str,
+        first: int = 50,
+        after: Optional[str] = None
+    ) -> SecondDegreePage:
+        """Get a page of a person's friends of friends."""
+        _require_size("first", first)
+        service = GraphService(info.context.owner, info.context)
+        return await info.context.schedule(
+            HEAVY,
+            lambda: service.get_second_degree_connections(person_id, first, after),
+            key=("second_degree_connections", person_id, first, after)
+        )
+    
+    @strawberry.field
+    async def suggestions(self, info: Info, person_id: str, first: int = 10) -> list[Suggestion]:
+        """Get ranked people a person may know through mutual connections."""
+        _require_size("first", first)
+        service = GraphService(info.context.owner, info.context)
+        return await info.context.schedule(
+            HEAVY,
+            lambda: service.get_suggestions(person_id, first),
+            key=("suggestions", person_id, first)
+        )
+    
+    @strawberry.field
+    async def graph(
+        self,
+        info: Info,
+        depth: int = 2,
+        sample: Optional[int] = None,
+        layout: bool = True,
+        as_of: Optional[date] = None
+    ) -> GraphData:
+        """Get the graph data for visualization, sampling hubs by trust."""
+        # Depth 2 returns up to 1 + sample + sample^2 people
+        _require_size("sample", sample, get_settings().graph_max_sample_size)
+        service = GraphService(info.context.owner, info.context)
+        return await info.context.schedule(
+            HEAVY,
+            lambda: service.get_graph_data(depth, sample, layout, as_of),
+            key=("graph_data", depth, sample, layout, as_of)
+        )
     
     @strawberry.field
-    async def people(self, tags: Optional[list[str]] = None) -> list[Person]:
-        """Get all people, optionally filtered by tags."""
-        service = GraphService()
-        return await service.get_people(tags)
+    async def graph_timeline(
+        self,
+        info: Info,
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ) -> list[TimelineBucket]:
+        """Get relationship counts per month for a time-travel scrubber."""
+        service = GraphService(info.context.owner, info.context)
+        return await info.context.schedule(
+            HEAVY,
+            lambda: service.get_graph_timeline(start, end),
+            key=("graph_timeline", start, end)
+        )
     
     @strawberry.field
-    async def graph(self, depth: int = 2) -> GraphData:
-        """Get the full graph data for visualization."""
-        service = GraphService()
-        return await service.get_graph_data(depth)
+    async def duplicate_candidates(
+        self,
+        info: Info,
+        first: int = 20,
+        min_score: float = 0.5
+    ) -> list[DuplicateCandidate]:
+        """Get likely duplicate people found by the dedup job."""
+        service = GraphService(info.context.owner, info.context)
+        return await info.context.schedule(
+            LIGHT,
+            lambda: service.get_duplicate_candidates(first, min_score),
+            key=("duplicate_candidates", first, min_score)
+        )
@@ -13,6 +13,8 @@ class Person:
     seeks: Optional[str] = None
     is_user: bool = False
     created_at: datetime = strawberry.field(default_factory=datetime.now)
+    connection_count: int = 0  # Maintained KNOWS degree, no expansion needed
+    community: Optional[str] = None
 
 
 @strawberry.type
@@ -33,6 +35,38 @@ class SecondDegreeConnection:
     connected_via: Person  # The mutual connection
 
 
+@strawberry.type
+class Suggestion:
+    """A friend-of-friend ranked as someone the person may know."""
+    person: Person
+    mutual_count: int  # Friends in common
+    trust_score: float  # Sum over mutual paths of trust products, 1.0 per 5x5 path
+    tag_overlap: float  # Jaccard of tags, 0-1
+    interest_overlap: float  # Offers/seeks word overlap in either direction, 0-1
+    score: float
+
+
+@strawberry.type
+class PageInfo:
+    """Keyset pagination state for a page of results."""
+    has_next_page: bool
+    end_cursor: Optional[str] = None
+
+
+@strawberry.type
+class ConnectionPage:
+    """A page of first-degree connections."""
+    items: list[Connection]
+    page_info: PageInfo
+
+
+@strawberry.type
+class SecondDegreePage:
+    """A page of second-degree connections."""
+    items: list[SecondDegreeConnection]
+    page_info: PageInfo
+
+
 @strawberry.type
 class PersonNode:
     """Node representation for graph visualization."""
@@ -41,6 +75,10 @@ class PersonNode:
     tags: list[str]
     is_user: bool
     degree: int  # 0 = user, 1 = first-degree, 2 = second-degree
+    connection_count: int = 0  # Total KNOWS relationships, including unsampled ones
+    community: Optional[str] = None
+    x: Optional[float] = None  # Precomputed layout position, user at the origin
+    y: Optional[float] = None
 
 
 @strawberry.type
@@ -60,6 +98,32 @@ class GraphData:
     edges: list[RelationshipEdge]
 
 
+@strawberry.type
+class Community:
+    """A cluster of closely connected people found by community detection."""
+    id: str
+    size: int
+    representatives: list[Person]  # Best-connected members
+
+
+@strawberry.type
+class DuplicateCandidate:
+    """A pair of people that likely describe the same person."""
+    person: Person
+    duplicate: Person
+    score: float  # Weighted blend of the two similarities below, 0-1
+    text_similarity: float  # Estimated Jaccard of name/bio/tag shingles
+    neighbor_overlap: float  # Jaccard of their KNOWS neighbors
+
+
+@strawberry.type
+class TimelineBucket:
+    """Relationships started in one month, for the time-travel scrubber."""
+    month: date  # First day of the month
+    count: int  # Relationships whose `since` falls in this month
+    total: int  # Relationships with `since` up to the end of this month
+
+
 # Input types for mutations
 @strawberry.input
 class PersonInput:
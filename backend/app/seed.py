@@ -1,24 +1,25 @@
 """
 Seed script to populate the database with sample data.
-Run with: python -m app.seed
+Run with: python -m app.seed [owner]
 """
 import asyncio
+import sys
 from datetime import date, datetime
 import uuid
 
-from .database import driver, close_driver
+from .config import get_settings
+from .database import get_session, close_driver, ensure_schema
+from .reset import reset
 
 
-async def clear_database():
-    """Remove all nodes and relationships."""
-    async with driver.session() as session:
-        await session.run("MATCH (n) DETACH DELETE n")
-        print("✓ Cleared existing data")
+async def clear_database(owner: str):
+    """Remove all nodes and relationships belonging to an owner."""
+    await reset([owner])
 
 
-async def create_seed_data():
-    """Create sample people and relationships."""
-    async with driver.session() as session:
+async def create_seed_data(owner: str):
+    """Create sample people and relationships for an owner."""
+    async with get_session() as session:
         # Create people
         people = [
             {
@@ -153,17 +154,23 @@ async def create_seed_data():
                     offers: $offers,
                     seeks: $seeks,
                     is_user: $is_user,
-                    created_at: $created_at
+                    created_at: $created_at,
+                    owner: $owner,
+                    degree: 0
                 })
                 """,
                 **person,
-                created_at=datetime.now()
+                created_at=datetime.now(),
+                owner=owner
             )
         print(f"✓ Created {len(people)} people")
         
         # Create relationships
         # First, get IDs by name for easier relationship creation
-        result = await session.run("MATCH (p:Person) RETURN p.id as id, p.name as name")
+        result = await session.run(
+            "MATCH (p:Person {owner: $owner}) RETURN p.id as id, p.name as name",
+            owner=owner
+        )
         records = await result.data()
         name_to_id = {r["name"]: r["id"] for r in records}
         
@@ -202,17 +209,21 @@ async def create_seed_data():
             
             await session.run(
                 """
-                MATCH (a:Person {id: $from_id}), (b:Person {id: $to_id})
+                MATCH (a:Person {owner: $owner, id: $from_id}), (b:Person {owner: $owner, id: $to_id})
                 CREATE (a)-[r:KNOWS {
                     id: $rel_id,
+                    owner: $owner,
                     since: $since,
                     trust_level: $trust_level,
                     context: $context,
                     notes: $notes
                 }]->(b)
+                SET a.degree = a.degree + 1,
+                    b.degree = b.degree + 1
                 """,
                 from_id=from_id,
                 to_id=to_id,
+                owner=owner,
                 rel_id=str(uuid.uuid4()),
                 since=since_date,
                 trust_level=trust,
@@ -228,9 +239,11 @@ async def create_seed_data():
 
 
 async def main():
-    print("Seeding Bimoi database...\n")
-    await clear_database()
-    await create_seed_data()
+    owner = sys.argv[1] if len(sys.argv) > 1 else get_settings().default_owner
+    print(f"Seeding Bimoi database for owner '{owner}'...\n")
+    await ensure_schema()
+    await clear_database(owner)
+    await create_seed_data(owner)
     await close_driver()
 
 
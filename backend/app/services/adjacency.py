@@ -0,0 +1,147 @@
+"""
+Array-based view of one owner's KNOWS graph.
+
+Loads people and relationships from Neo4j into flat NumPy arrays and builds
+an undirected CSR adjacency from them. Used by offline tooling (snapshots)
+and batch analytics that would be too slow as Cypher traversals.
+"""
+from dataclasses import dataclass
+from datetime import date
+from typing import Optional
+
+import numpy as np
+
+from ..database import cypher, get_session
+
+# Days since the Unix epoch; used to store KNOWS.since as int32
+EPOCH = date(1970, 1, 1)
+# Sorts before every real date, so unknown dates never fall inside a range
+NO_DATE = int(np.iinfo(np.int32).min)
+
+
+LOAD_PEOPLE = cypher(
+    """
+    MATCH (p:Person {owner: $owner})
+    RETURN p.id as id, p.name as name, p.tags as tags
+    ORDER BY p.id
+    """,
+    owner=""
+)
+
+
+LOAD_RELATIONSHIPS = cypher(
+    """
+    MATCH (a:Person {owner: $owner})-[r:KNOWS]->(b:Person)
+    RETURN a.id as source, b.id as target, r.trust_level as trust_level, r.since as since
+    """,
+    owner=""
+)
+
+
+@dataclass
+class Adjacency:
+    """Undirected CSR adjacency: neighbors of node i are
+    ``neighbors[offsets[i]:offsets[i + 1]]`` with matching ``weights``."""
+    offsets: np.ndarray
+    neighbors: np.ndarray
+    weights: np.ndarray
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.offsets) - 1
+
+    def degrees(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+
+@dataclass
+class GraphArrays:
+    """People and KNOWS relationships of one owner as parallel arrays.
+
+    Nodes are ordered by person id. Each relationship appears once, as
+    ``(source[k], target[k])`` node indices.
+    """
+    ids: list[str]
+    names: list[str]
+    tags: list[list[str]]
+    source: np.ndarray
+    target: np.ndarray
+    trust: np.ndarray
+    since: np.ndarray
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.ids)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.source)
+
+    def index(self) -> dict[str, int]:
+        """Map person ids to node indices."""
+        return {person_id: i for i, person_id in enumerate(self.ids)}
+
+    def csr(self) -> Adjacency:
+        return build_csr(self.num_nodes, self.source, self.target, self.trust)
+
+
+def build_csr(
+    num_nodes: int,
+    source: np.ndarray,
+    target: np.ndarray,
+    weights: np.ndarray
+) -> Adjacency:
+    """Build an undirected CSR adjacency from an edge list.
+
+    Every edge is stored in both directions and each node's neighbors are
+    sorted by index.
+    """
+    src = np.concatenate([source, target]).astype(np.int32, copy=False)
+    dst = np.concatenate([target, source]).astype(np.int32, copy=False)
+    w = np.concatenate([weights, weights])
+    order = np.lexsort((dst, src))
+    counts = np.bincount(src, minlength=num_nodes)
+    offsets = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return Adjacency(offsets=offsets, neighbors=dst[order], weights=w[order])
+
+
+def date_to_days(value: Optional[date]) -> int:
+    """Convert a (Neo4j or Python) date to days since the epoch."""
+    if value is None:
+        return NO_DATE
+    if hasattr(value, "to_native"):
+        value = value.to_native()
+    return (value - EPOCH).days
+
+
+async def load_graph(owner: str) -> GraphArrays:
+    """Load one owner's people and KNOWS relationships into arrays."""
+    ids: list[str] = []
+    names: list[str] = []
+    tags: list[list[str]] = []
+    async with get_session() as session:
+        result = await session.run(LOAD_PEOPLE, owner=owner)
+        async for record in result:
+            ids.append(record["id"])
+            names.append(record["name"] or "")
+            tags.append(record["tags"] or [])
+
+        index = {person_id: i for i, person_id in enumerate(ids)}
+        source, target, trust, since = [], [], [], []
+        result = await session.run(LOAD_RELATIONSHIPS, owner=owner)
+        async for record in result:
+            source.append(index[record["source"]])
+            target.append(index[record["target"]])
+            trust.append(record["trust_level"] or 0)
+            since.append(date_to_days(record["since"]))
+
+    return GraphArrays(
+        ids=ids,
+        names=names,
+        tags=tags,
+        source=np.asarray(source, dtype=np.int32),
+        target=np.asarray(target, dtype=np.int32),
+        trust=np.asarray(trust, dtype=np.int8),
+        since=np.asarray(since, dtype=np.int32)
+    )
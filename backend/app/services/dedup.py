@@ -0,0 +1,274 @@
+"""
+Duplicate-person detection with MinHash signatures and LSH banding.
+
+Each person is described by character shingles of their normalized name and
+bio plus one token per tag. A MinHash signature of ``NUM_PERMUTATIONS``
+multiply-shift hashes estimates the Jaccard similarity of two shingle sets,
+and splitting signatures into ``BANDS`` bands makes people that agree on a
+whole band collide in a bucket. Only those candidate pairs are scored, so the
+job is near-linear in the number of people instead of quadratic.
+
+A candidate's score blends the estimated text similarity with the Jaccard
+overlap of the two people's KNOWS neighbors. Pairs above the threshold are
+stored as ``POSSIBLE_DUPLICATE`` relationships, replacing the previous run's,
+and served by the ``duplicateCandidates`` query; ``mergePeople`` resolves them.
+
+Run with: python -m app.services.dedup [--owner OWNER] [--min-score SCORE]
+"""
+import argparse
+import asyncio
+import re
+import unicodedata
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+
+from ..config import get_settings
+from ..database import close_driver, cypher, get_session
+from .adjacency import Adjacency, load_graph
+
+SHINGLE_SIZE = 3
+NUM_PERMUTATIONS = 128
+# 32 bands of 4 rows: pairs above ~0.45 estimated similarity usually collide
+BANDS = 32
+# Buckets larger than this are skipped (e.g. many people with near-empty profiles)
+MAX_BUCKET_SIZE = 100
+TEXT_WEIGHT = 0.7
+NEIGHBOR_WEIGHT = 0.3
+DEFAULT_MIN_SCORE = 0.5
+# People whose signatures are computed at once (bounds the hash matrix)
+SIGNATURE_CHUNK_SIZE = 2000
+PERSIST_BATCH_SIZE = 5000
+
+
+LOAD_BIOS = cypher(
+    """
+    MATCH (p:Person {owner: $owner})
+    WHERE p.bio IS NOT NULL
+    RETURN p.id as id, p.bio as bio
+    """,
+    owner=""
+)
+
+
+CLEAR_DUPLICATES = cypher(
+    """
+    MATCH (:Person {owner: $owner})-[d:POSSIBLE_DUPLICATE]->(:Person)
+    DELETE d
+    """,
+    owner=""
+)
+
+
+SAVE_DUPLICATES = cypher(
+    """
+    UNWIND $rows AS row
+    MATCH (a:Person {owner: $owner, id: row.a}), (b:Person {owner: $owner, id: row.b})
+    CREATE (a)-[:POSSIBLE_DUPLICATE {
+        owner: $owner,
+        score: row.score,
+        text_similarity: row.text_similarity,
+        neighbor_overlap: row.neighbor_overlap,
+        detected_at: $detected_at
+    }]->(b)
+    """,
+    owner="", rows=[], detected_at=datetime.now()
+)
+
+
+@dataclass
+class DuplicatePair:
+    a: int
+    b: int
+    score: float
+    text_similarity: float
+    neighbor_overlap: float
+
+
+@dataclass
+class DedupStats:
+    people: int
+    candidates: int
+    duplicates: int
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents and collapse punctuation/whitespace."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r"[\W_]+", " ", text.lower()).strip()
+
+
+def shingles(name: str, bio: str, tags: list[str]) -> set[str]:
+    """Character n-grams of name and bio, plus one token per tag."""
+    features = set()
+    for prefix, text in (("n", name), ("b", bio)):
+        text = f" {normalize(text)} "
+        if len(text.strip()) == 0:
+            continue
+        for i in range(max(len(text) - SHINGLE_SIZE + 1, 1)):
+            features.add(prefix + text[i:i + SHINGLE_SIZE])
+    features.update("t" + normalize(tag) for tag in tags)
+    return features
+
+
+def minhash_signatures(feature_sets: list[set[str]], seed: int = 0) -> np.ndarray:
+    """Return a (people, NUM_PERMUTATIONS) uint32 MinHash matrix.
+
+    Uses multiply-shift hashing ``(a * x + b) >> 32`` in wrapping uint64
+    arithmetic. People without features get all-max signatures and are
+    never bucketed together.
+    """
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2 ** 63, NUM_PERMUTATIONS, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2 ** 63, NUM_PERMUTATIONS, dtype=np.uint64)
+    empty = np.uint32(np.iinfo(np.uint32).max)
+    signatures = np.full((len(feature_sets), NUM_PERMUTATIONS), empty, dtype=np.uint32)
+
+    for start in range(0, len(feature_sets), SIGNATURE_CHUNK_SIZE):
+        chunk = feature_sets[start:start + SIGNATURE_CHUNK_SIZE]
+        sizes = np.fromiter((len(f) for f in chunk), dtype=np.int64, count=len(chunk))
+        if sizes.sum() == 0:
+            continue
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode()) for features in chunk for s in features),
+            dtype=np.uint64, count=int(sizes.sum())
+        )
+        with np.errstate(over="ignore"):
+            permuted = ((hashes[:, None] * a[None, :] + b[None, :]) >> np.uint64(32)).astype(np.uint32)
+        # Minimum per person over its run of rows
+        nonempty = np.flatnonzero(sizes)
+        starts = (np.cumsum(sizes) - sizes)[nonempty]
+        signatures[start + nonempty] = np.minimum.reduceat(permuted, starts, axis=0)
+    return signatures
+
+
+def lsh_candidates(signatures: np.ndarray) -> np.ndarray:
+    """Return unique (i, j) index pairs, i < j, that share at least one band."""
+    n, width = signatures.shape
+    rows = width // BANDS
+    empty = (signatures == np.iinfo(np.uint32).max).all(axis=1)
+    people = np.flatnonzero(~empty)
+    pairs = []
+    for band in range(BANDS):
+        block = np.ascontiguousarray(signatures[people, band * rows:(band + 1) * rows])
+        keys = block.view(np.dtype((np.void, block.dtype.itemsize * rows))).ravel()
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        boundaries = np.flatnonzero(sorted_keys[1:] != sorted_keys[:-1]) + 1
+        for bucket in np.split(order, boundaries):
+            if 1 < len(bucket) <= MAX_BUCKET_SIZE:
+                members = np.sort(people[bucket])
+                i, j = np.triu_indices(len(members), k=1)
+                pairs.append(members[i] * n + members[j])
+    if not pairs:
+        return np.zeros((0, 2), dtype=np.int64)
+    keys = np.unique(np.concatenate(pairs))
+    return np.stack([keys // n, keys % n], axis=1)
+
+
+def neighbor_overlap(adjacency: Adjacency, i: int, j: int) -> float:
+    """Jaccard overlap of two nodes' neighbors, ignoring each other."""
+    a = adjacency.neighbors[adjacency.offsets[i]:adjacency.offsets[i + 1]]
+    b = adjacency.neighbors[adjacency.offsets[j]:adjacency.offsets[j + 1]]
+    a, b = a[a != j], b[b != i]
+    union = len(np.union1d(a, b))
+    return len(np.intersect1d(a, b)) / union if union else 0.0
+
+
+def score_pairs(
+    signatures: np.ndarray,
+    adjacency: Adjacency,
+    pairs: np.ndarray,
+    min_score: float
+) -> list[DuplicatePair]:
+    """Score candidate pairs and keep those at or above ``min_score``."""
+    if len(pairs) == 0:
+        return []
+    text = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+    # Skip pairs that would miss min_score even with identical neighbors
+    plausible = TEXT_WEIGHT * text + NEIGHBOR_WEIGHT >= min_score
+    scored = []
+    for (i, j), similarity in zip(pairs[plausible], text[plausible]):
+        overlap = neighbor_overlap(adjacency, int(i), int(j))
+        score = TEXT_WEIGHT * similarity + NEIGHBOR_WEIGHT * overlap
+        if score >= min_score:
+            scored.append(DuplicatePair(
+                a=int(i), b=int(j), score=float(score),
+                text_similarity=float(similarity), neighbor_overlap=float(overlap)
+            ))
+    return sorted(scored, key=lambda p: p.score, reverse=True)
+
+
+async def detect_duplicates(owner: str, min_score: float = DEFAULT_MIN_SCORE) -> DedupStats:
+    """Find likely duplicate people and store them as POSSIBLE_DUPLICATE."""
+    graph = await load_graph(owner)
+    bios: dict[str, str] = {}
+    async with get_session() as session:
+        result = await session.run(LOAD_BIOS, owner=owner)
+        async for record in result:
+            bios[record["id"]] = record["bio"]
+
+    def find() -> tuple[int, list[DuplicatePair]]:
+        features = [
+            shingles(name, bios.get(person_id, ""), tags)
+            for person_id, name, tags in zip(graph.ids, graph.names, graph.tags)
+        ]
+        signatures = minhash_signatures(features)
+        pairs = lsh_candidates(signatures)
+        return len(pairs), score_pairs(signatures, graph.csr(), pairs, min_score)
+
+    candidates, duplicates = await asyncio.to_thread(find)
+
+    rows = [
+        {
+            "a": graph.ids[d.a],
+            "b": graph.ids[d.b],
+            "score": d.score,
+            "text_similarity": d.text_similarity,
+            "neighbor_overlap": d.neighbor_overlap,
+        }
+        for d in duplicates
+    ]
+    detected_at = datetime.now()
+    async with get_session() as session:
+        result = await session.run(CLEAR_DUPLICATES, owner=owner)
+        await result.consume()
+        for start in range(0, len(rows), PERSIST_BATCH_SIZE):
+            result = await session.run(
+                SAVE_DUPLICATES,
+                owner=owner,
+                rows=rows[start:start + PERSIST_BATCH_SIZE],
+                detected_at=detected_at
+            )
+            await result.consume()
+
+    return DedupStats(people=graph.num_nodes, candidates=candidates, duplicates=len(rows))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m app.services.dedup",
+        description="Find likely duplicate people in an owner's graph."
+    )
+    parser.add_argument("--owner", default=get_settings().default_owner)
+    parser.add_argument("--min-score", type=float, default=DEFAULT_MIN_SCORE)
+    args = parser.parse_args()
+
+    async def run():
+        try:
+            return await detect_duplicates(args.owner, min_score=args.min_score)
+        finally:
+            await close_driver()
+
+    stats = asyncio.run(run())
+    print(
+        f"✓ {stats.duplicates} likely duplicates among {stats.people} people "
+        f"({stats.candidates} LSH candidate pairs scored)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,610 @@
-from typing import Optional
-from datetime import datetime
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Optional
+from datetime import date, datetime
+import base64
+import json
 import uuid
 
-from ..database import get_session
+from ..config import get_settings
+from ..database import cypher, get_session
+from .layout import get_layout_cache
+from .scheduler import get_scheduler
+from .suggestions import SuggestionRanker, get_suggestion_cache
+from .write_queue import get_write_coalescer
+if TYPE_CHECKING:
+    from ..context import RequestContext
 from ..schema.types import (
     Person, Connection, SecondDegreeConnection,
-    PersonNode, RelationshipEdge, GraphData,
+    PageInfo, ConnectionPage, SecondDegreePage,
+    PersonNode, RelationshipEdge, GraphData, Community, TimelineBucket, DuplicateCandidate,
+    Suggestion,
     PersonInput, ConnectionInput
 )
 
 
+def encode_cursor(*values) -> str:
+    """Encode a keyset position as an opaque pagination cursor."""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> list:
+    """Decode a cursor produced by ``encode_cursor``."""
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+GET_USER = cypher(
+    """
+    MATCH (p:Person {owner: $owner, is_user: true})
+    RETURN p {
+        .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at, .degree, .community
+    } as person
+    """,
+    owner=""
+)
+
+
+GET_PERSON = cypher(
+    """
+    MATCH (p:Person {owner: $owner, id: $id})
+    RETURN p {
+        .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at, .degree, .community
+    } as person
+    """,
+    owner="", id=""
+)
+
+
+GET_PEOPLE_BY_TAGS = cypher(
+    """
+    MATCH (p:Person {owner: $owner})
+    WHERE any(tag IN $tags WHERE tag IN p.tags)
+    RETURN p {
+        .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at, .degree, .community
+    } as person
+    ORDER BY p.name
+    """,
+    owner="", tags=[""]
+)
+
+
+GET_PEOPLE_BY_COMMUNITY = cypher(
+    """
+    MATCH (p:Person {owner: $owner, community: $community})
+    WHERE $tags IS NULL OR any(tag IN $tags WHERE tag IN p.tags)
+    RETURN p {
+        .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at, .degree, .community
+    } as person
+    ORDER BY p.name
+    """,
+    owner="", community="", tags=[""], nullable=("tags",)
+)
+
+
+GET_COMMUNITIES = cypher(
+    """
+    MATCH (p:Person {owner: $owner})
+    WHERE p.community IS NOT NULL
+    WITH p ORDER BY p.degree DESC, p.name
+    WITH p.community as community, count(p) as size, collect(p)[..$members] as members
+    RETURN community, size, [m IN members | m {
+        .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at, .degree, .community
+    }] as members
+    ORDER BY size DESC, community
+    LIMIT $first
+    """,
+    owner="", members=1, first=1
+)
+
+
+GET_PEOPLE = cypher(
+    """
+    MATCH (p:Person {owner: $owner})
+    RETURN p {
+        .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at, .degree, .community
+    } as person
+    ORDER BY p.name
+    """,
+    owner=""
+)
+
+
+GET_CONNECTIONS = cypher(
+    """
+    MATCH (p:Person {owner: $owner, id: $id})-[r:KNOWS]-(other:Person)
+    WHERE ($min_trust IS NULL OR r.trust_level >= $min_trust)
+      AND ($as_of IS NULL OR r.since <= $as_of)
+      AND ($after_trust IS NULL
+           OR r.trust_level < $after_trust
+           OR (r.trust_level = $after_trust AND other.name > $after_name)
+           OR (r.trust_level = $after_trust AND other.name = $after_name
+               AND r.id > $after_id))
+    RETURN other {
+        .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at, .degree, .community
+    } as person,
+    r {
+        .id, .since, .trust_level, .context, .notes
+    } as relationship
+    ORDER BY r.trust_level DESC, other.name, r.id
+    LIMIT $limit
+    """,
+    owner="", id="", min_trust=0, as_of=date.today(),
+    after_trust=0, after_name="", after_id="", limit=1,
+    nullable=("min_trust", "as_of", "after_trust", "after_name", "after_id")
+)
+
+
+GET_SECOND_DEGREE_CONNECTIONS = cypher(
+    """
+    MATCH (me:Person {owner: $owner, id: $id})-[:KNOWS]-(friend:Person)-[:KNOWS]-(fof:Person)
+    WHERE me <> fof AND NOT (me)-[:KNOWS]-(fof)
+    WITH DISTINCT fof, friend
+    WHERE $after_name IS NULL
+       OR fof.name > $after_name
+       OR (fof.name = $after_name AND fof.id > $after_id)
+       OR (fof.name = $after_name AND fof.id = $after_id AND friend.id > $after_via)
+    RETURN fof {
+        .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at, .degree, .community
+    } as person,
+    friend {
+        .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at, .degree, .community
+    } as connected_via
+    ORDER BY fof.name, fof.id, friend.id
+    LIMIT $limit
+    """,
+    owner="", id="", after_name="", after_id="", after_via="", limit=1,
+    nullable=("after_name", "after_id", "after_via")
+)
+
+
+GET_SUGGESTION_PROFILE = cypher(
+    """
+    MATCH (p:Person {owner: $owner, id: $id})
+    RETURN p.tags as tags, p.offers as offers, p.seeks as seeks,
+           [(p)-[:KNOWS]-(f:Person) | f.id] as friends
+    """,
+    owner="", id=""
+)
+
+
+# One row per friend-of-friend with every connecting path aggregated
+GET_SUGGESTION_CANDIDATES = cypher(
+    """
+    MATCH (p:Person {owner: $owner, id: $id})-[r1:KNOWS]-(friend:Person)-[r2:KNOWS]-(fof:Person)
+    WHERE fof <> p AND NOT (p)-[:KNOWS]-(fof)
+    WITH fof,
+         count(DISTINCT friend) as mutual_count,
+         sum(coalesce(r1.trust_level, 3) * coalesce(r2.trust_level, 3)) as path_trust
+    RETURN fof {
+        .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at, .degree, .community
+    } as person, mutual_count, path_trust
+    """,
+    owner="", id=""
+)
+
+
+GET_USER_ID = cypher(
+    """
+    MATCH (user:Person {owner: $owner, is_user: true})
+    RETURN user.id as user_id
+    """,
+    owner=""
+)
+
+
+GET_GRAPH_NODES = cypher(
+    """
+    MATCH (user:Person {owner: $owner, is_user: true})
+    CALL {
+        WITH user
+        OPTIONAL MATCH (user)-[r:KNOWS]-(f:Person)
+        WHERE $as_of IS NULL OR r.since <= $as_of
+        WITH f, r ORDER BY r.trust_level DESC, f.id
+        RETURN collect(DISTINCT f)[..$sample] as friends
+    }
+    CALL {
+        WITH user, friends
+        UNWIND (CASE WHEN $depth >= 2 THEN friends ELSE [] END) as friend
+        CALL {
+            WITH user, friend
+            MATCH (friend)-[r:KNOWS]-(fof:Person)
+            WHERE fof <> user AND ($as_of IS NULL OR r.since <= $as_of)
+              // Every direct friend is degree 1, sampled or not
+              AND NOT EXISTS {
+                  MATCH (user)-[u:KNOWS]-(fof)
+                  WHERE $as_of IS NULL OR u.since <= $as_of
+              }
+            WITH fof, r ORDER BY r.trust_level DESC, fof.id
+            RETURN collect(fof)[..$sample] as sampled
+        }
+        UNWIND sampled as fof
+        RETURN collect(DISTINCT fof) as fofs
+    }
+    WITH [{person: user, degree: 0}]
+         + [f IN friends | {person: f, degree: 1}]
+         + [f IN fofs | {person: f, degree: 2}] as conns
+    UNWIND conns as conn
+    RETURN 
+        conn.person.id as id,
+        conn.person.name as name,
+        conn.person.tags as tags,
+        conn.degree = 0 as is_user,
+        conn.degree as degree,
+        conn.person.degree as connection_count,
+        conn.person.community as community
+    """,
+    owner="", depth=2, sample=1, as_of=date.today(), nullable=("as_of",)
+)
+
+
+GET_ALL_GRAPH_NODES = cypher(
+    """
+    MATCH (p:Person {owner: $owner})
+    RETURN p.id as id, p.name as name, p.tags as tags, 
+           p.is_user as is_user, 
+           CASE WHEN p.is_user THEN 0 ELSE 1 END as degree,
+           p.degree as connection_count,
+           p.community as community
+    """,
+    owner=""
+)
+
+
+GET_GRAPH_EDGES = cypher(
+    """
+    MATCH (a:Person {owner: $owner})-[r:KNOWS]-(b:Person)
+    WHERE a.id IN $node_ids AND b.id IN $node_ids AND a.id < b.id
+      AND ($as_of IS NULL OR r.since <= $as_of)
+    RETURN r.id as id, a.id as source, b.id as target, 
+           r.trust_level as trust_level, r.context as context
+    """,
+    owner="", node_ids=[""], as_of=date.today(), nullable=("as_of",)
+)
+
+
+GET_GRAPH_TIMELINE = cypher(
+    """
+    MATCH ()-[r:KNOWS]->()
+    WHERE r.owner = $owner AND r.since IS NOT NULL
+      AND ($end IS NULL OR r.since <= $end)
+    WITH date.truncate('month', r.since) as month, count(*) as count
+    RETURN month, count
+    ORDER BY month
+    """,
+    owner="", end=date.today(), nullable=("end",)
+)
+
+
+CREATE_PERSON = cypher(
+    """
+    CREATE (p:Person {
+        id: $id,
+        name: $name,
+        bio: $bio,
+        tags: $tags,
+        offers: $offers,
+        seeks: $seeks,
+        is_user: false,
+        created_at: $created_at,
+        degree: 0,
+        owner: $owner
+    })
+    RETURN p {
+        .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at, .degree, .community
+    } as person
+    """,
+    owner="", id="", name="", bio="", tags=[""], offers="", seeks="", created_at=datetime.now(),
+    nullable=("bio", "offers", "seeks")
+)
+
+
+UPDATE_PERSON = cypher(
+    """
+    MATCH (p:Person {owner: $owner, id: $id})
+    SET p.name = $name,
+        p.bio = $bio,
+        p.tags = $tags,
+        p.offers = $offers,
+        p.seeks = $seeks
+    RETURN p {
+        .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at, .degree, .community
+    } as person
+    """,
+    owner="", id="", name="", bio="", tags=[""], offers="", seeks="",
+    nullable=("bio", "offers", "seeks")
+)
+
+
+DELETE_PEOPLE_RELATIONSHIPS = cypher(
+    """
+    MATCH (p:Person {owner: $owner})-[r:KNOWS]-(:Person)
+    WHERE p.id IN $ids
+    WITH DISTINCT r
+    CALL {
+        WITH r
+        WITH r, startNode(r) as a, endNode(r) as b
+        SET a.degree = a.degree - 1,
+            b.degree = b.degree - 1,
+            a.community_dirty = true,
+            b.community_dirty = true
+        DELETE r
+    } IN TRANSACTIONS OF $batch_size ROWS
+    RETURN count(*) as deleted
+    """,
+    owner="", ids=[""], batch_size=1
+)
+
+
+# Single-statement form of the two above, for the request transaction
+DELETE_PERSON = cypher(
+    """
+    MATCH (p:Person {owner: $owner, id: $id})
+    OPTIONAL MATCH (p)-[:KNOWS]-(other:Person)
+    WHERE other <> p
+    SET other.degree = other.degree - 1,
+        other.community_dirty = true
+    WITH DISTINCT p
+    DETACH DELETE p
+    RETURN count(p) as deleted
+    """,
+    owner="", id=""
+)
+
+
+DELETE_PEOPLE_NODES = cypher(
+    """
+    MATCH (p:Person {owner: $owner})
+    WHERE p.id IN $ids
+    CALL {
+        WITH p
+        DETACH DELETE p
+    } IN TRANSACTIONS OF $batch_size ROWS
+    RETURN count(*) as deleted
+    """,
+    owner="", ids=[""], batch_size=1
+)
+
+
+COUNT_PEOPLE = cypher(
+    """
+    MATCH (p:Person {owner: $owner})
+    RETURN count(p) as count
+    """,
+    owner=""
+)
+
+
+GET_PERSON_IDS = cypher(
+    """
+    MATCH (p:Person {owner: $owner})
+    RETURN p.id as id
+    LIMIT $limit
+    """,
+    owner="", limit=1
+)
+
+
+UNSET_USER = cypher(
+    """
+    MATCH (p:Person {owner: $owner, is_user: true})
+    SET p.is_user = false
+    """,
+    owner=""
+)
+
+
+SET_USER = cypher(
+    """
+    MATCH (p:Person {owner: $owner, id: $id})
+    SET p.is_user = true
+    RETURN p {
+        .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at, .degree, .community
+    } as person
+    """,
+    owner="", id=""
+)
+
+
+CREATE_CONNECTION = cypher(
+    """
+    MATCH (a:Person {owner: $owner, id: $from_id}), (b:Person {owner: $owner, id: $to_id})
+    CREATE (a)-[r:KNOWS {
+        id: $rel_id,
+        owner: $owner,
+        since: $since,
+        trust_level: $trust_level,
+        context: $context,
+        notes: $notes
+    }]->(b)
+    SET a.degree = coalesce(a.degree, 0) + 1,
+        b.degree = coalesce(b.degree, 0) + 1,
+        a.community_dirty = true,
+        b.community_dirty = true
+    RETURN b {
+        .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at, .degree, .community
+    } as person,
+    r {
+        .id, .since, .trust_level, .context, .notes
+    } as relationship
+    """,
+    owner="", from_id="", to_id="", rel_id="", since=date.today(), trust_level=3, context="", notes="",
+    nullable=("since", "context", "notes")
+)
+
+
+UPDATE_CONNECTION = cypher(
+    """
+    MATCH (a:Person)-[r:KNOWS {owner: $owner, id: $rel_id}]-(b:Person)
+    SET r.since = $since,
+        r.trust_level = $trust_level,
+        r.context = $context,
+        r.notes = $notes
+    RETURN a.id as source_id, b {
+        .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at, .degree, .community
+    } as person,
+    r {
+        .id, .since, .trust_level, .context, .notes
+    } as relationship
+    """,
+    owner="", rel_id="", since=date.today(), trust_level=3, context="", notes="",
+    nullable=("since", "context", "notes")
+)
+
+
+DELETE_CONNECTION = cypher(
+    """
+    MATCH (a:Person)-[r:KNOWS {owner: $owner, id: $rel_id}]->(b:Person)
+    SET a.degree = a.degree - 1,
+        b.degree = b.degree - 1,
+        a.community_dirty = true,
+        b.community_dirty = true
+    DELETE r
+    RETURN count(r) as deleted, collect(a.id) + collect(b.id) as people
+    """,
+    owner="", rel_id=""
+)
+
+
+GET_DUPLICATE_CANDIDATES = cypher(
+    """
+    MATCH (a:Person {owner: $owner})-[d:POSSIBLE_DUPLICATE]->(b:Person)
+    WHERE d.score >= $min_score
+    RETURN a {
+        .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at, .degree, .community
+    } as person,
+    b {
+        .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at, .degree, .community
+    } as duplicate,
+    d.score as score, d.text_similarity as text_similarity, d.neighbor_overlap as neighbor_overlap
+    ORDER BY d.score DESC, a.id, b.id
+    LIMIT $first
+    """,
+    owner="", min_score=0.5, first=1
+)
+
+
+# mergePeople runs MERGE_OUTGOING, MERGE_INCOMING and MERGE_PEOPLE in one
+# transaction: relationships of the merged person are copied onto the kept one
+# (skipping people the kept person already knows), then the merged person is
+# deleted and every affected degree is recounted
+MERGE_OUTGOING = cypher(
+    """
+    MATCH (keep:Person {owner: $owner, id: $keep_id}), (dup:Person {owner: $owner, id: $merge_id})
+    MATCH (dup)-[r:KNOWS]->(other:Person)
+    WHERE other <> keep AND NOT (keep)-[:KNOWS]-(other)
+    CREATE (keep)-[moved:KNOWS]->(other)
+    SET moved = properties(r)
+    RETURN count(moved) as moved
+    """,
+    owner="", keep_id="", merge_id=""
+)
+
+MERGE_INCOMING = cypher(
+    """
+    MATCH (keep:Person {owner: $owner, id: $keep_id}), (dup:Person {owner: $owner, id: $merge_id})
+    MATCH (other:Person)-[r:KNOWS]->(dup)
+    WHERE other <> keep AND NOT (keep)-[:KNOWS]-(other)
+    CREATE (other)-[moved:KNOWS]->(keep)
+    SET moved = properties(r)
+    RETURN count(moved) as moved
+    """,
+    owner="", keep_id="", merge_id=""
+)
+
+MERGE_PEOPLE = cypher(
+    """
+    MATCH (keep:Person {owner: $owner, id: $keep_id}), (dup:Person {owner: $owner, id: $merge_id})
+    OPTIONAL MATCH (dup)-[:KNOWS]-(n:Person)
+    WHERE n <> keep
+    WITH keep, dup, collect(DISTINCT n) as neighbors
+    SET keep.bio = coalesce(keep.bio, dup.bio),
+        keep.offers = coalesce(keep.offers, dup.offers),
+        keep.seeks = coalesce(keep.seeks, dup.seeks),
+        keep.tags = coalesce(keep.tags, []) +
+            [t IN coalesce(dup.tags, []) WHERE NOT t IN coalesce(keep.tags, [])],
+        keep.is_user = coalesce(keep.is_user, false) OR coalesce(dup.is_user, false)
+    DETACH DELETE dup
+    WITH keep, neighbors
+    UNWIND neighbors + [keep] as n
+    SET n.degree = COUNT { (n)-[:KNOWS]-(:Person) },
+        n.community_dirty = true
+    WITH DISTINCT keep
+    RETURN keep {
+        .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at, .degree, .community
+    } as person
+    """,
+    owner="", keep_id="", merge_id=""
+)
+
+
+# Batched forms of update_person/update_connection used by the write coalescer
+UPDATE_PEOPLE_BATCH = cypher(
+    """
+    UNWIND $rows AS row
+    MATCH (p:Person {owner: row.owner, id: row.id})
+    SET p.name = row.name,
+        p.bio = row.bio,
+        p.tags = row.tags,
+        p.offers = row.offers,
+        p.seeks = row.seeks
+    RETURN row.owner as owner, row.id as id, p {
+        .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at, .degree, .community
+    } as person
+    """,
+    rows=[]
+)
+
+UPDATE_CONNECTIONS_BATCH = cypher(
+    """
+    UNWIND $rows AS row
+    MATCH (a:Person)-[r:KNOWS {owner: row.owner, id: row.id}]->(b:Person)
+    SET r.since = row.since,
+        r.trust_level = row.trust_level,
+        r.context = row.context,
+        r.notes = row.notes
+    RETURN row.owner as owner, row.id as id, a.id as source_id, b {
+        .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at, .degree, .community
+    } as person,
+    r {
+        .id, .since, .trust_level, .context, .notes
+    } as relationship
+    """,
+    rows=[]
+)
+
+
 class GraphService:
-    """Service for interacting with the Neo4j graph database."""
+    """Service for interacting with the Neo4j graph database.
+    
+    Every query and mutation is scoped to a single owner, so one Neo4j
+    instance can host many independent graphs. Nodes and relationships
+    carry an ``owner`` property backed by composite ``(owner, id)`` indexes.
+    
+    When created with a GraphQL request ``context``, statements run on the
+    request's shared session (inside its write transaction for mutations)
+    and hot lookups are memoized for the rest of the request. Without one,
+    each method opens its own session.
+    """
+    
+    def __init__(self, owner: str, context: Optional["RequestContext"] = None):
+        self.owner = owner
+        self.context = context
+    
+    def _session(self):
+        """The request's session or transaction, else a new session."""
+        if self.context is not None:
+            return self.context.session()
+        return get_session()
+    
+    @property
+    def _in_request_transaction(self) -> bool:
+        return self.context is not None and self.context.transactional
+    
+    async def _memoized(self, key: Any, load: Callable[[], Awaitable[Any]]) -> Any:
+        if self.context is None:
+            return await load()
+        return await self.context.memoized(key, load)
     
     def _record_to_person(self, record: dict) -> Person:
         """Convert a Neo4j record to a Person object."""
@@ -23,178 +616,319 @@ class GraphService:
             offers=record.get("offers"),
             seeks=record.get("seeks"),
             is_user=record.get("is_user", False),
-            created_at=record.get("created_at", datetime.now())
+            created_at=record.get("created_at", datetime.now()),
+            connection_count=record.get("degree") or 0,
+            community=record.get("community")
+        )
+    
+    def _record_to_connection(self, record: dict) -> Connection:
+        """Convert a person/relationship record pair to a Connection object."""
+        rel = record["relationship"]
+        return Connection(
+            person=self._record_to_person(record["person"]),
+            relationship_id=rel.get("id", ""),
+            since=rel.get("since"),
+            trust_level=rel.get("trust_level", 3),
+            context=rel.get("context"),
+            notes=rel.get("notes")
         )
     
+    def _invalidate(self, *person_ids: str):
+        """Drop cached results that depend on people a mutation touched."""
+        def invalidate():
+            get_suggestion_cache().invalidate(self.owner, person_ids)
+            get_scheduler().bump(self.owner)
+        
+        invalidate()
+        if self.context is not None:
+            self.context.memo.clear()
+            # Results recomputed before the request commits would be stale
+            self.context.after_commit(invalidate)
+    
     async def get_user(self) -> Optional[Person]:
         """Get the person marked as the current user."""
-        async with get_session() as session:
-            result = await session.run(
-                """
-                MATCH (p:Person {is_user: true})
-                RETURN p {
-                    .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at
-                } as person
-                """
-            )
-            record = await result.single()
-            if record:
-                return self._record_to_person(record["person"])
-            return None
+        async def load():
+            async with self._session() as session:
+                result = await session.run(
+                    GET_USER,
+                    owner=self.owner
+                )
+                record = await result.single()
+                if record:
+                    return self._record_to_person(record["person"])
+                return None
+        
+        return await self._memoized("user", load)
     
     async def get_person(self, person_id: str) -> Optional[Person]:
         """Get a specific person by ID."""
-        async with get_session() as session:
-            result = await session.run(
-                """
-                MATCH (p:Person {id: $id})
-                RETURN p {
-                    .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at
-                } as person
-                """,
-                id=person_id
-            )
-            record = await result.single()
-            if record:
-                return self._record_to_person(record["person"])
-            return None
+        async def load():
+            async with self._session() as session:
+                result = await session.run(
+                    GET_PERSON,
+                    owner=self.owner,
+                    id=person_id
+                )
+                record = await result.single()
+                if record:
+                    return self._record_to_person(record["person"])
+                return None
+        
+        return await self._memoized(("person", person_id), load)
     
-    async def get_people(self, tags: Optional[list[str]] = None) -> list[Person]:
-        """Get all people, optionally filtered by tags."""
-        async with get_session() as session:
-            if tags and len(tags) > 0:
+    async def get_people(
+        self,
+        tags: Optional[list[str]] = None,
+        community: Optional[str] = None
+    ) -> list[Person]:
+        """Get all people, optionally filtered by tags and/or community."""
+        async with self._session() as session:
+            if community:
+                result = await session.run(
+                    GET_PEOPLE_BY_COMMUNITY,
+                    owner=self.owner,
+                    community=community,
+                    tags=tags or None
+                )
+            elif tags and len(tags) > 0:
                 result = await session.run(
-                    """
-                    MATCH (p:Person)
-                    WHERE any(tag IN $tags WHERE tag IN p.tags)
-                    RETURN p {
-                        .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at
-                    } as person
-                    ORDER BY p.name
-                    """,
+                    GET_PEOPLE_BY_TAGS,
+                    owner=self.owner,
                     tags=tags
                 )
             else:
                 result = await session.run(
-                    """
-                    MATCH (p:Person)
-                    RETURN p {
-                        .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at
-                    } as person
-                    ORDER BY p.name
-                    """
+                    GET_PEOPLE,
+                    owner=self.owner
                 )
             records = await result.data()
             return [self._record_to_person(r["person"]) for r in records]
     
-    async def get_connections(self, person_id: str) -> list[Connection]:
-        """Get all first-degree connections for a person."""
-        async with get_session() as session:
+    async def get_communities(self, first: int = 20, members: int = 3) -> list[Community]:
+        """Get the largest communities with their best-connected members."""
+        async with self._session() as session:
             result = await session.run(
-                """
-                MATCH (p:Person {id: $id})-[r:KNOWS]-(other:Person)
-                RETURN other {
-                    .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at
-                } as person,
-                r {
-                    .id, .since, .trust_level, .context, .notes
-                } as relationship
-                ORDER BY r.trust_level DESC, other.name
-                """,
-                id=person_id
+                GET_COMMUNITIES,
+                owner=self.owner,
+                first=first,
+                members=members
             )
             records = await result.data()
-            connections = []
-            for r in records:
-                person = self._record_to_person(r["person"])
-                rel = r["relationship"]
-                connections.append(Connection(
-                    person=person,
-                    relationship_id=rel.get("id", ""),
-                    since=rel.get("since"),
-                    trust_level=rel.get("trust_level", 3),
-                    context=rel.get("context"),
-                    notes=rel.get("notes")
-                ))
-            return connections
+            return [
+                Community(
+                    id=r["community"],
+                    size=r["size"],
+                    representatives=[self._record_to_person(m) for m in r["members"]]
+                )
+                for r in records
+            ]
     
-    async def get_second_degree_connections(self, person_id: str) -> list[SecondDegreeConnection]:
-        """Get second-degree connections (friends of friends)."""
-        async with get_session() as session:
+    async def get_duplicate_candidates(
+        self,
+        first: int = 20,
+        min_score: float = 0.5
+    ) -> list[DuplicateCandidate]:
+        """Get likely duplicate pairs found by the dedup job, best first."""
+        async with self._session() as session:
             result = await session.run(
-                """
-                MATCH (me:Person {id: $id})-[:KNOWS]-(friend:Person)-[:KNOWS]-(fof:Person)
-                WHERE me <> fof AND NOT (me)-[:KNOWS]-(fof)
-                RETURN DISTINCT fof {
-                    .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at
-                } as person,
-                friend {
-                    .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at
-                } as connected_via
-                ORDER BY fof.name
-                """,
-                id=person_id
+                GET_DUPLICATE_CANDIDATES,
+                owner=self.owner,
+                min_score=min_score,
+                first=first
             )
             records = await result.data()
             return [
-                SecondDegreeConnection(
+                DuplicateCandidate(
                     person=self._record_to_person(r["person"]),
-                    connected_via=self._record_to_person(r["connected_via"])
+                    duplicate=self._record_to_person(r["duplicate"]),
+                    score=r["score"],
+                    text_similarity=r["text_similarity"],
+                    neighbor_overlap=r["neighbor_overlap"]
                 )
                 for r in records
             ]
     
-    async def get_graph_data(self, depth: int = 2) -> GraphData:
-        """Get all graph data for visualization."""
-        async with get_session() as session:
-            # Get the user node first
-            user_result = await session.run(
-                """
-                MATCH (user:Person {is_user: true})
-                RETURN user.id as user_id
-                """
+    async def get_connections(
+        self,
+        person_id: str,
+        first: int = 50,
+        after: Optional[str] = None,
+        min_trust: Optional[int] = None,
+        as_of: Optional[date] = None
+    ) -> ConnectionPage:
+        """Get a page of first-degree connections, highest trust first.
+        
+        Pages are keyset-paginated on (trust_level DESC, name, relationship
+        id), so fetching a page costs the same regardless of its position.
+        With ``as_of``, only relationships whose ``since`` is on or before
+        that date are included.
+        """
+        after_trust, after_name, after_id = decode_cursor(after) if after else (None, None, None)
+        async with self._session() as session:
+            result = await session.run(
+                GET_CONNECTIONS,
+                owner=self.owner,
+                id=person_id,
+                min_trust=min_trust,
+                as_of=as_of,
+                after_trust=after_trust,
+                after_name=after_name,
+                after_id=after_id,
+                limit=first + 1
+            )
+            records = await result.data()
+            connections = [self._record_to_connection(r) for r in records[:first]]
+            end_cursor = None
+            if connections:
+                last = connections[-1]
+                end_cursor = encode_cursor(last.trust_level, last.person.name, last.relationship_id)
+            return ConnectionPage(
+                items=connections,
+                page_info=PageInfo(has_next_page=len(records) > first, end_cursor=end_cursor)
+            )
+    
+    async def get_suggestions(self, person_id: str, first: int = 10) -> list[Suggestion]:
+        """Rank friends-of-friends a person may know.
+        
+        Each candidate is aggregated once with its mutual-connection count and
+        trust-weighted path score, then scored with tag and offers/seeks overlap
+        into a bounded heap of size ``first``. Results are cached per person
+        until a mutation touches the person, one of their friends or one of the
+        candidates, or until the cache TTL expires.
+        """
+        cache = get_suggestion_cache()
+        cached = cache.get(self.owner, person_id, first)
+        if cached is not None:
+            return cached
+        
+        generation = cache.generation(self.owner)
+        async with self._session() as session:
+            result = await session.run(
+                GET_SUGGESTION_PROFILE,
+                owner=self.owner,
+                id=person_id
             )
-            user_record = await user_result.single()
-            user_id = user_record["user_id"] if user_record else None
+            profile = await result.single()
+            if profile is None:
+                raise ValueError(f"Person with id {person_id} not found")
+            ranker = SuggestionRanker(profile["tags"], profile["offers"], profile["seeks"], first)
+            depends_on = set(profile["friends"])
+            mutual_counts = {}
             
-            # Get all nodes with their degree from the user
+            result = await session.run(
+                GET_SUGGESTION_CANDIDATES,
+                owner=self.owner,
+                id=person_id
+            )
+            async for record in result:
+                person = record["person"]
+                depends_on.add(person["id"])
+                mutual_counts[person["id"]] = record["mutual_count"]
+                ranker.push(person, record["path_trust"])
+        
+        suggestions = [
+            Suggestion(
+                person=self._record_to_person(c.record),
+                mutual_count=mutual_counts[c.person_id],
+                trust_score=c.trust_score,
+                tag_overlap=c.tag_overlap,
+                interest_overlap=c.interest_overlap,
+                score=c.score
+            )
+            for c in ranker.top()
+        ]
+        cache.put(self.owner, person_id, first, suggestions, depends_on, generation)
+        return suggestions
+    
+    async def get_second_degree_connections(
+        self,
+        person_id: str,
+        first: int = 50,
+        after: Optional[str] = None
+    ) -> SecondDegreePage:
+        """Get a page of second-degree connections (friends of friends).
+        
+        One row per (friend of friend, mutual friend) pair, keyset-paginated
+        on (name, id, mutual friend id).
+        """
+        after_name, after_id, after_via = decode_cursor(after) if after else (None, None, None)
+        async with self._session() as session:
+            result = await session.run(
+                GET_SECOND_DEGREE_CONNECTIONS,
+                owner=self.owner,
+                id=person_id,
+                after_name=after_name,
+                after_id=after_id,
+                after_via=after_via,
+                limit=first + 1
+            )
+            records = await result.data()
+            items = [
+                SecondDegreeConnection(
+                    person=self._record_to_person(r["person"]),
+                    connected_via=self._record_to_person(r["connected_via"])
+                )
+                for r in records[:first]
+            ]
+            end_cursor = None
+            if items:
+                last = items[-1]
+                end_cursor = encode_cursor(last.person.name, last.person.id, last.connected_via.id)
+            return SecondDegreePage(
+                items=items,
+                page_info=PageInfo(has_next_page=len(records) > first, end_cursor=end_cursor)
+            )
+    
+    async def _get_user_id(self) -> Optional[str]:
+        if self.context is not None and "user" in self.context.memo:
+            user = await self.context.memo["user"]
+            return user.id if user else None
+        async with self._session() as session:
+            result = await session.run(
+                GET_USER_ID,
+                owner=self.owner
+            )
+            record = await result.single()
+            return record["user_id"] if record else None
+    
+    async def get_graph_data(
+        self,
+        depth: int = 2,
+        sample: Optional[int] = None,
+        layout: bool = True,
+        as_of: Optional[date] = None
+    ) -> GraphData:
+        """Get graph data for visualization.
+        
+        Around the user, each node contributes at most ``sample`` neighbors
+        (its most trusted ones), so hubs with thousands of connections do not
+        blow up the traversal or the rendered graph. With ``layout``, nodes
+        carry precomputed positions from the layout cache (unless the graph
+        has more than ``layout_max_nodes`` nodes). With ``as_of``,
+        only relationships whose ``since`` is on or before that date are
+        traversed. That is a filter on the relationships the traversal
+        reaches, not an index lookup (only ``GET_GRAPH_TIMELINE`` can use the
+        ``(owner, since)`` relationship index). Layouts of different dates
+        seed each other, so moving through dates only refines positions.
+        """
+        sample = sample or get_settings().graph_sample_size
+        # Get the user node first (shared with `me` within a request)
+        user_id = await self._memoized("user_id", self._get_user_id)
+        async with self._session() as session:
+            # Get the sampled neighborhood with each node's degree from the user
             if user_id and depth >= 1:
                 nodes_result = await session.run(
-                    """
-                    MATCH (user:Person {is_user: true})
-                    OPTIONAL MATCH path = (user)-[:KNOWS*1..2]-(p:Person)
-                    WITH user, p, 
-                         CASE 
-                            WHEN p IS NULL THEN null
-                            WHEN length(path) = 1 THEN 1 
-                            ELSE 2 
-                         END as degree
-                    WITH collect(DISTINCT {person: p, degree: degree}) as connections, user
-                    UNWIND connections as conn
-                    WITH user, conn
-                    WHERE conn.person IS NOT NULL
-                    RETURN DISTINCT 
-                        conn.person.id as id,
-                        conn.person.name as name,
-                        conn.person.tags as tags,
-                        conn.person.is_user as is_user,
-                        conn.degree as degree
-                    UNION
-                    MATCH (user:Person {is_user: true})
-                    RETURN user.id as id, user.name as name, user.tags as tags, 
-                           true as is_user, 0 as degree
-                    """,
-                    depth=depth
+                    GET_GRAPH_NODES,
+                    owner=self.owner,
+                    depth=depth,
+                    sample=sample,
+                    as_of=as_of
                 )
             else:
                 # Fallback: just get all people
                 nodes_result = await session.run(
-                    """
-                    MATCH (p:Person)
-                    RETURN p.id as id, p.name as name, p.tags as tags, 
-                           p.is_user as is_user, 
-                           CASE WHEN p.is_user THEN 0 ELSE 1 END as degree
-                    """
+                    GET_ALL_GRAPH_NODES,
+                    owner=self.owner
                 )
             
             nodes_records = await nodes_result.data()
@@ -204,7 +938,9 @@ class GraphService:
                     name=r["name"],
                     tags=r.get("tags", []),
                     is_user=r.get("is_user", False),
-                    degree=r.get("degree", 1)
+                    degree=r.get("degree", 1),
+                    connection_count=r.get("connection_count") or 0,
+                    community=r.get("community")
                 )
                 for r in nodes_records if r["id"]
             ]
@@ -213,13 +949,10 @@ class GraphService:
             node_ids = [n.id for n in nodes]
             if node_ids:
                 edges_result = await session.run(
-                    """
-                    MATCH (a:Person)-[r:KNOWS]-(b:Person)
-                    WHERE a.id IN $node_ids AND b.id IN $node_ids AND a.id < b.id
-                    RETURN r.id as id, a.id as source, b.id as target, 
-                           r.trust_level as trust_level, r.context as context
-                    """,
-                    node_ids=node_ids
+                    GET_GRAPH_EDGES,
+                    owner=self.owner,
+                    node_ids=node_ids,
+                    as_of=as_of
                 )
                 edges_records = await edges_result.data()
                 edges = [
@@ -234,31 +967,49 @@ class GraphService:
                 ]
             else:
                 edges = []
-            
-            return GraphData(nodes=nodes, edges=edges)
+        
+        graph = GraphData(nodes=nodes, edges=edges)
+        if layout:
+            await get_layout_cache().apply((self.owner, depth, sample), graph, variant=as_of)
+        return graph
+    
+    async def get_graph_timeline(
+        self,
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ) -> list[TimelineBucket]:
+        """Count relationships by the month of their ``since`` date.
+        
+        Each bucket carries the new relationships that month and the running
+        total up to it, so a scrubber can show the graph size at any point.
+        Relationships without a ``since`` date are not counted.
+        """
+        async with self._session() as session:
+            result = await session.run(
+                GET_GRAPH_TIMELINE,
+                owner=self.owner,
+                end=end
+            )
+            records = await result.data()
+        
+        buckets = []
+        total = 0
+        for r in records:
+            month = r["month"].to_native() if hasattr(r["month"], "to_native") else r["month"]
+            total += r["count"]
+            if start is None or month >= date(start.year, start.month, 1):
+                buckets.append(TimelineBucket(month=month, count=r["count"], total=total))
+        return buckets
     
     async def create_person(self, input: PersonInput) -> Person:
         """Create a new person node."""
         person_id = str(uuid.uuid4())
         created_at = datetime.now()
         
-        async with get_session() as session:
+        async with self._session() as session:
             result = await session.run(
-                """
-                CREATE (p:Person {
-                    id: $id,
-                    name: $name,
-                    bio: $bio,
-                    tags: $tags,
-                    offers: $offers,
-                    seeks: $seeks,
-                    is_user: false,
-                    created_at: $created_at
-                })
-                RETURN p {
-                    .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at
-                } as person
-                """,
+                CREATE_PERSON,
+                owner=self.owner,
                 id=person_id,
                 name=input.name,
                 bio=input.bio,
@@ -268,23 +1019,38 @@ class GraphService:
                 created_at=created_at
             )
             record = await result.single()
+            self._invalidate()
             return self._record_to_person(record["person"])
     
     async def update_person(self, person_id: str, input: PersonInput) -> Person:
-        """Update an existing person."""
-        async with get_session() as session:
+        """Update an existing person.
+        
+        Coalesced batches commit on their own, so updates inside the request
+        transaction are never coalesced.
+        """
+        coalescer = None if self._in_request_transaction else get_write_coalescer()
+        if coalescer:
+            record = await coalescer.submit(
+                UPDATE_PEOPLE_BATCH,
+                self.owner,
+                person_id,
+                {
+                    "name": input.name,
+                    "bio": input.bio,
+                    "tags": input.tags,
+                    "offers": input.offers,
+                    "seeks": input.seeks
+                }
+            )
+            if record:
+                self._invalidate(person_id)
+                return self._record_to_person(record["person"])
+            raise ValueError(f"Person with id {person_id} not found")
+        
+        async with self._session() as session:
             result = await session.run(
-                """
-                MATCH (p:Person {id: $id})
-                SET p.name = $name,
-                    p.bio = $bio,
-                    p.tags = $tags,
-                    p.offers = $offers,
-                    p.seeks = $seeks
-                RETURN p {
-                    .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at
-                } as person
-                """,
+                UPDATE_PERSON,
+                owner=self.owner,
                 id=person_id,
                 name=input.name,
                 bio=input.bio,
@@ -294,46 +1060,149 @@ class GraphService:
             )
             record = await result.single()
             if record:
+                self._invalidate(person_id)
                 return self._record_to_person(record["person"])
             raise ValueError(f"Person with id {person_id} not found")
     
     async def delete_person(self, person_id: str) -> bool:
-        """Delete a person and all their relationships."""
-        async with get_session() as session:
-            result = await session.run(
-                """
-                MATCH (p:Person {id: $id})
-                DETACH DELETE p
-                RETURN count(p) as deleted
-                """,
-                id=person_id
-            )
+        """Delete a person and all their relationships.
+        
+        Inside the request transaction this is a single statement; otherwise
+        it is batched like ``delete_people``.
+        """
+        if not self._in_request_transaction:
+            return await self.delete_people([person_id]) > 0
+        async with self._session() as tx:
+            result = await tx.run(DELETE_PERSON, owner=self.owner, id=person_id)
             record = await result.single()
-            return record["deleted"] > 0
+        self._invalidate(person_id)
+        return record["deleted"] > 0
+    
+    async def delete_people(
+        self,
+        person_ids: list[str],
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> int:
+        """Delete people and their relationships in bounded transactions.
+        
+        People are processed in chunks of ``delete_chunk_size``. Within a chunk,
+        relationships and then nodes are removed with ``CALL { ... } IN
+        TRANSACTIONS`` of ``delete_batch_size`` rows, so hubs never build one
+        huge transaction. Each step is idempotent: an interrupted deletion is
+        resumed by running it again. ``progress(done, total)`` is called after
+        every chunk. Returns the number of people deleted.
+        
+        ``CALL { ... } IN TRANSACTIONS`` needs auto-commit transactions, so
+        this always uses its own session and cannot join the request
+        transaction of a multi-field mutation.
+        """
+        if self._in_request_transaction:
+            raise ValueError(
+                "Batched deletion cannot run inside a multi-field mutation; send it as its own operation"
+            )
+        settings = get_settings()
+        ids = list(dict.fromkeys(person_ids))
+        chunk_size = settings.delete_chunk_size
+        deleted = 0
+        for start in range(0, len(ids), chunk_size):
+            chunk = ids[start:start + chunk_size]
+            async with get_session() as session:
+                result = await session.run(
+                    DELETE_PEOPLE_RELATIONSHIPS,
+                    owner=self.owner,
+                    ids=chunk,
+                    batch_size=settings.delete_batch_size
+                )
+                await result.consume()
+                result = await session.run(
+                    DELETE_PEOPLE_NODES,
+                    owner=self.owner,
+                    ids=chunk,
+                    batch_size=settings.delete_batch_size
+                )
+                record = await result.single()
+                deleted += record["deleted"]
+            self._invalidate(*chunk)
+            if progress:
+                progress(start + len(chunk), len(ids))
+        return deleted
+    
+    async def clear(self, progress: Optional[Callable[[int, int], None]] = None) -> int:
+        """Delete every person of this owner in bounded batches.
+        
+        Safe to interrupt and re-run: each pass deletes whatever is left.
+        ``progress(done, total)`` is called after every chunk.
+        """
+        settings = get_settings()
+        async with get_session() as session:
+            result = await session.run(COUNT_PEOPLE, owner=self.owner)
+            total = (await result.single())["count"]
+        
+        deleted = 0
+        while True:
+            async with get_session() as session:
+                result = await session.run(
+                    GET_PERSON_IDS,
+                    owner=self.owner,
+                    limit=settings.delete_chunk_size
+                )
+                ids = [r["id"] for r in await result.data()]
+            if not ids:
+                return deleted
+            removed = await self.delete_people(ids)
+            if removed == 0:
+                # Nothing matched (e.g. people without an id); avoid looping forever
+                return deleted
+            deleted += removed
+            if progress:
+                progress(min(deleted, total), total)
+    
+    async def merge_people(self, keep_id: str, merge_id: str) -> Person:
+        """Merge a duplicate person into another in a single transaction.
+        
+        The merged person's relationships are re-pointed to the kept person
+        (relationships to people the kept person already knows are dropped),
+        missing profile fields and tags are copied over, and the merged person
+        is deleted.
+        """
+        if keep_id == merge_id:
+            raise ValueError("Cannot merge a person into themselves")
+        
+        async def merge(tx):
+            for statement in (MERGE_OUTGOING, MERGE_INCOMING):
+                result = await tx.run(statement, owner=self.owner, keep_id=keep_id, merge_id=merge_id)
+                await result.consume()
+            result = await tx.run(MERGE_PEOPLE, owner=self.owner, keep_id=keep_id, merge_id=merge_id)
+            return await result.single()
+        
+        if self._in_request_transaction:
+            async with self._session() as tx:
+                record = await merge(tx)
+        else:
+            async with get_session() as session:
+                record = await session.execute_write(merge)
+        if record:
+            self._invalidate(keep_id, merge_id)
+            return self._record_to_person(record["person"])
+        raise ValueError(f"Person with id {keep_id} or {merge_id} not found")
     
     async def set_as_user(self, person_id: str) -> Person:
         """Set a person as the current user (unset any previous user)."""
-        async with get_session() as session:
+        async with self._session() as session:
             # First, unset any existing user
             await session.run(
-                """
-                MATCH (p:Person {is_user: true})
-                SET p.is_user = false
-                """
+                UNSET_USER,
+                owner=self.owner
             )
             # Then set the new user
             result = await session.run(
-                """
-                MATCH (p:Person {id: $id})
-                SET p.is_user = true
-                RETURN p {
-                    .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at
-                } as person
-                """,
+                SET_USER,
+                owner=self.owner,
                 id=person_id
             )
             record = await result.single()
             if record:
+                self._invalidate()
                 return self._record_to_person(record["person"])
             raise ValueError(f"Person with id {person_id} not found")
     
@@ -346,24 +1215,10 @@ class GraphService:
         """Create a KNOWS relationship between two people."""
         relationship_id = str(uuid.uuid4())
         
-        async with get_session() as session:
+        async with self._session() as session:
             result = await session.run(
-                """
-                MATCH (a:Person {id: $from_id}), (b:Person {id: $to_id})
-                CREATE (a)-[r:KNOWS {
-                    id: $rel_id,
-                    since: $since,
-                    trust_level: $trust_level,
-                    context: $context,
-                    notes: $notes
-                }]->(b)
-                RETURN b {
-                    .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at
-                } as person,
-                r {
-                    .id, .since, .trust_level, .context, .notes
-                } as relationship
-                """,
+                CREATE_CONNECTION,
+                owner=self.owner,
                 from_id=from_id,
                 to_id=to_id,
                 rel_id=relationship_id,
@@ -374,16 +1229,8 @@ class GraphService:
             )
             record = await result.single()
             if record:
-                person = self._record_to_person(record["person"])
-                rel = record["relationship"]
-                return Connection(
-                    person=person,
-                    relationship_id=rel["id"],
-                    since=rel.get("since"),
-                    trust_level=rel.get("trust_level", 3),
-                    context=rel.get("context"),
-                    notes=rel.get("notes")
-                )
+                self._invalidate(from_id, to_id)
+                return self._record_to_connection(record)
             raise ValueError("Failed to create connection")
     
     async def update_connection(
@@ -391,22 +1238,29 @@ class GraphService:
         relationship_id: str, 
         input: ConnectionInput
     ) -> Connection:
-        """Update an existing relationship."""
-        async with get_session() as session:
+        """Update an existing relationship (never coalesced in the request transaction)."""
+        coalescer = None if self._in_request_transaction else get_write_coalescer()
+        if coalescer:
+            record = await coalescer.submit(
+                UPDATE_CONNECTIONS_BATCH,
+                self.owner,
+                relationship_id,
+                {
+                    "since": input.since,
+                    "trust_level": input.trust_level,
+                    "context": input.context,
+                    "notes": input.notes
+                }
+            )
+            if record:
+                self._invalidate(record["source_id"], record["person"]["id"])
+                return self._record_to_connection(record)
+            raise ValueError(f"Relationship with id {relationship_id} not found")
+        
+        async with self._session() as session:
             result = await session.run(
-                """
-                MATCH (a:Person)-[r:KNOWS {id: $rel_id}]-(b:Person)
-                SET r.since = $since,
-                    r.trust_level = $trust_level,
-                    r.context = $context,
-                    r.notes = $notes
-                RETURN b {
-                    .id, .name, .bio, .tags, .offers, .seeks, .is_user, .created_at
-                } as person,
-                r {
-                    .id, .since, .trust_level, .context, .notes
-                } as relationship
-                """,
+                UPDATE_CONNECTION,
+                owner=self.owner,
                 rel_id=relationship_id,
                 since=input.since,
                 trust_level=input.trust_level,
@@ -415,28 +1269,18 @@ class GraphService:
             )
             record = await result.single()
             if record:
-                person = self._record_to_person(record["person"])
-                rel = record["relationship"]
-                return Connection(
-                    person=person,
-                    relationship_id=rel["id"],
-                    since=rel.get("since"),
-                    trust_level=rel.get("trust_level", 3),
-                    context=rel.get("context"),
-                    notes=rel.get("notes")
-                )
+                self._invalidate(record["source_id"], record["person"]["id"])
+                return self._record_to_connection(record)
             raise ValueError(f"Relationship with id {relationship_id} not found")
     
     async def delete_connection(self, relationship_id: str) -> bool:
         """Delete a relationship between two people."""
-        async with get_session() as session:
+        async with self._session() as session:
             result = await session.run(
-                """
-                MATCH ()-[r:KNOWS {id: $rel_id}]-()
-                DELETE r
-                RETURN count(r) as deleted
-                """,
+                DELETE_CONNECTION,
+                owner=self.owner,
                 rel_id=relationship_id
             )
             record = await result.single()
+            self._invalidate(*record["people"])
             return record["deleted"] > 0
@@ -0,0 +1,347 @@
+"""
+Server-side force-directed layout for the visualization graph.
+
+Fruchterman–Reingold with trust-weighted springs, vectorized with NumPy.
+Small graphs use exact pairwise repulsion. Larger graphs use Barnes–Hut
+over a quadtree: a group of nodes that is small relative to its distance
+repels as one body at its centroid, so each iteration is O(n log n) however
+clustered the layout is. Each layout stops at a time budget, and graphs above
+``layout_max_nodes`` are returned without positions.
+
+Layouts are cached per owner and query shape. When the graph changes only
+slightly, the new layout is seeded from the previous positions and refined
+with a few low-temperature iterations instead of being recomputed.
+"""
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Hashable, Optional
+
+import numpy as np
+
+from ..config import get_settings
+
+if TYPE_CHECKING:
+    # Typing only: the schema package imports the services that import this
+    from ..schema.types import GraphData
+
+# Graphs up to this size use exact O(n^2) repulsion
+EXACT_REPULSION_MAX_NODES = 400
+# Barnes–Hut opening criterion: two cells interact as bodies if the larger
+# one's size / the distance between their centroids < THETA
+THETA = 0.8
+# Quadtree cells with at most this many nodes are not split
+LEAF_SIZE = 4
+# Deepest quadtree level (cells of 2^-16 of the layout's extent)
+MAX_DEPTH = 16
+# Distance between connected nodes in client pixels (the layout runs with k = 1)
+PIXELS_PER_UNIT = 60.0
+FULL_ITERATIONS = 120
+REFINE_ITERATIONS = 30
+# Above this fraction of new nodes, incremental refinement is not worth it
+INCREMENTAL_MAX_CHANGE = 0.25
+
+
+def _exact_repulsion(pos: np.ndarray) -> np.ndarray:
+    dx = pos[:, None, 0] - pos[None, :, 0]
+    dy = pos[:, None, 1] - pos[None, :, 1]
+    inv = 1.0 / np.maximum(dx * dx + dy * dy, 1e-4)
+    return np.stack([(dx * inv).sum(axis=1), (dy * inv).sum(axis=1)], axis=1)
+
+
+def _ranges(counts: np.ndarray) -> np.ndarray:
+    """Concatenated ``arange(c)`` for every ``c`` in ``counts``."""
+    return np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+
+def _spread_bits(v: np.ndarray) -> np.ndarray:
+    """Move bit k of each 16-bit value to bit 2k (for Morton codes)."""
+    v = (v | (v << np.uint64(8))) & np.uint64(0x00FF00FF)
+    v = (v | (v << np.uint64(4))) & np.uint64(0x0F0F0F0F)
+    v = (v | (v << np.uint64(2))) & np.uint64(0x33333333)
+    return (v | (v << np.uint64(1))) & np.uint64(0x55555555)
+
+
+@dataclass
+class _Quadtree:
+    """Cells as flat arrays; cell 0 is the root.
+
+    The nodes of cell c are ``order[start[c]:end[c]]`` and its children are
+    the cells ``child_start[c]:child_end[c]`` (none for a leaf).
+    """
+    order: np.ndarray
+    start: np.ndarray
+    end: np.ndarray
+    centroid: np.ndarray
+    size: np.ndarray
+    child_start: np.ndarray
+    child_end: np.ndarray
+
+
+def _quadtree(pos: np.ndarray) -> _Quadtree:
+    """Build a quadtree over ``pos`` from sorted Morton codes.
+
+    Every cell is a run of equal code prefixes, so the tree is built one
+    level at a time with array operations. Cells with at most ``LEAF_SIZE``
+    nodes (or at ``MAX_DEPTH``) are leaves.
+    """
+    n = len(pos)
+    lo = pos.min(axis=0)
+    span = max(float((pos.max(axis=0) - lo).max()), 1e-9)
+    side = 1 << MAX_DEPTH
+    grid = np.minimum(((pos - lo) / span * side).astype(np.uint64), np.uint64(side - 1))
+    code = _spread_bits(grid[:, 0]) | (_spread_bits(grid[:, 1]) << np.uint64(1))
+    order = np.argsort(code, kind="stable")
+    code = code[order]
+    cumulative = np.zeros((n + 1, 2))
+    np.cumsum(pos[order], axis=0, out=cumulative[1:])
+
+    starts, ends, sizes, parents = [np.array([0])], [np.array([n])], [np.array([span])], [np.array([-1])]
+    level_start, level_end = starts[0], ends[0]
+    first_id = 0
+    for level in range(MAX_DEPTH):
+        split = np.flatnonzero(level_end - level_start > LEAF_SIZE)
+        if len(split) == 0:
+            break
+        # Children are the runs of equal prefixes one level down inside split cells
+        shift = np.uint64(2 * (MAX_DEPTH - level - 1))
+        prefix = code >> shift
+        cuts = np.flatnonzero(prefix[1:] != prefix[:-1]) + 1
+        child_start = np.concatenate([[0], cuts])
+        child_end = np.concatenate([cuts, [n]])
+        parent = np.searchsorted(level_start, child_start, side="right") - 1
+        inside = np.isin(parent, split) & (child_start < level_end[parent])
+        level_start, level_end = child_start[inside], child_end[inside]
+        starts.append(level_start)
+        ends.append(level_end)
+        sizes.append(np.full(len(level_start), span / 2 ** (level + 1)))
+        parents.append(first_id + parent[inside])
+        first_id += len(starts[-2])
+
+    start = np.concatenate(starts)
+    end = np.concatenate(ends)
+    parent = np.concatenate(parents)
+    # Children of each cell are contiguous, since levels are ordered by position
+    child_start = np.searchsorted(parent[1:], np.arange(len(start)), side="left") + 1
+    child_end = np.searchsorted(parent[1:], np.arange(len(start)), side="right") + 1
+    centroid = (cumulative[end] - cumulative[start]) / (end - start)[:, None]
+    return _Quadtree(order, start, end, centroid, np.concatenate(sizes), child_start, child_end)
+
+
+def _barnes_hut_repulsion(pos: np.ndarray) -> np.ndarray:
+    """Repulsion with a Barnes–Hut quadtree, O(n log n) time and memory.
+
+    The nodes of each leaf descend the tree as a group: every (leaf, cell)
+    pair either treats the cell as one body acting on the leaf's centroid,
+    repels the two leaves' nodes exactly, or is replaced by pairs with the
+    cell's children.
+    """
+    n = len(pos)
+    tree = _quadtree(pos)
+    count = tree.end - tree.start
+    leaves = np.flatnonzero(tree.child_start == tree.child_end)
+    # In tree order, so the leaves' nodes are order[0:n] in sequence
+    leaves = leaves[np.argsort(tree.start[leaves], kind="stable")]
+    leaf_force = np.zeros((len(tree.start), 2))
+    force = np.zeros((n, 2))
+    target = leaves
+    source = np.zeros(len(leaves), dtype=np.int64)
+    while len(target):
+        delta = tree.centroid[target] - tree.centroid[source]
+        dist2 = np.maximum((delta ** 2).sum(axis=1), 1e-4)
+        contains = (tree.start[source] <= tree.start[target]) & (tree.start[target] < tree.end[source])
+        extent = np.maximum(tree.size[target], tree.size[source])
+        far = ~contains & (extent ** 2 < THETA ** 2 * dist2)
+        push = delta[far] * (count[source[far]] / dist2[far])[:, None]
+        leaf_force[:, 0] += np.bincount(target[far], weights=push[:, 0], minlength=len(leaf_force))
+        leaf_force[:, 1] += np.bincount(target[far], weights=push[:, 1], minlength=len(leaf_force))
+
+        # Near leaves: every node of the target against every node of the source
+        near = ~far & (tree.child_start[source] == tree.child_end[source])
+        t, s = target[near], source[near]
+        pairs = count[t] * count[s]
+        k = _ranges(pairs)
+        width = np.repeat(count[s], pairs)
+        i = tree.order[np.repeat(tree.start[t], pairs) + k // width]
+        j = tree.order[np.repeat(tree.start[s], pairs) + k % width]
+        keep = i != j
+        i, j = i[keep], j[keep]
+        delta = pos[i] - pos[j]
+        push = delta / np.maximum((delta ** 2).sum(axis=1), 1e-4)[:, None]
+        force[:, 0] += np.bincount(i, weights=push[:, 0], minlength=n)
+        force[:, 1] += np.bincount(i, weights=push[:, 1], minlength=n)
+
+        opened = ~far & ~near
+        children = (tree.child_end - tree.child_start)[source[opened]]
+        target = np.repeat(target[opened], children)
+        source = np.repeat(tree.child_start[source[opened]], children) + _ranges(children)
+
+    # Far-field force on each leaf applies to all of its nodes
+    force[tree.order] += np.repeat(leaf_force[leaves], count[leaves], axis=0)
+    return force
+
+
+def force_layout(
+    num_nodes: int,
+    source: np.ndarray,
+    target: np.ndarray,
+    weights: np.ndarray,
+    initial: Optional[np.ndarray] = None,
+    iterations: int = FULL_ITERATIONS,
+    temperature: Optional[float] = None,
+    seed: int = 0,
+    time_budget: Optional[float] = None
+) -> np.ndarray:
+    """Compute 2D positions (in layout units, k = 1) for a graph.
+
+    ``weights`` scale the spring strength of each edge (trust level / 5).
+    ``initial`` seeds the positions; otherwise nodes start on a random disc.
+    After ``time_budget`` seconds the current positions are returned even if
+    not all iterations ran.
+    """
+    deadline = None if time_budget is None else time.monotonic() + time_budget
+    if num_nodes == 0:
+        return np.zeros((0, 2))
+    rng = np.random.default_rng(seed)
+    if initial is None:
+        radius = np.sqrt(num_nodes)
+        angle = rng.uniform(0, 2 * np.pi, num_nodes)
+        r = radius * np.sqrt(rng.uniform(0, 1, num_nodes))
+        pos = np.stack([r * np.cos(angle), r * np.sin(angle)], axis=1)
+    else:
+        pos = np.array(initial, dtype=np.float64)
+    if num_nodes == 1:
+        return pos
+
+    repulsion = _exact_repulsion if num_nodes <= EXACT_REPULSION_MAX_NODES else _barnes_hut_repulsion
+    t = temperature if temperature is not None else np.sqrt(num_nodes) / 4
+    cooling = t / max(iterations, 1)
+    for _ in range(iterations):
+        if deadline is not None and time.monotonic() > deadline:
+            break
+        force = repulsion(pos)
+        if len(source):
+            delta = pos[source] - pos[target]
+            dist = np.sqrt(np.maximum((delta ** 2).sum(axis=-1), 1e-8))
+            pull = delta * (dist * weights)[:, None]
+            for axis in (0, 1):
+                force[:, axis] += np.bincount(target, weights=pull[:, axis], minlength=num_nodes)
+                force[:, axis] -= np.bincount(source, weights=pull[:, axis], minlength=num_nodes)
+        # Weak gravity keeps disconnected components on screen
+        force -= 0.01 * pos
+        length = np.sqrt(np.maximum((force ** 2).sum(axis=-1), 1e-12))
+        pos += force / length[:, None] * np.minimum(length, t)[:, None]
+        t = max(t - cooling, 0.01)
+    return pos
+
+
+def graph_signature(graph: "GraphData") -> str:
+    """Stable fingerprint of a graph's nodes and edges (the layout version)."""
+    digest = hashlib.blake2b(digest_size=16)
+    for node_id in sorted(n.id for n in graph.nodes):
+        digest.update(node_id.encode())
+        digest.update(b"\0")
+    digest.update(b"\1")
+    for edge in sorted((e.source, e.target, e.trust_level) for e in graph.edges):
+        digest.update(f"{edge[0]}\0{edge[1]}\0{edge[2]}\0".encode())
+    return digest.hexdigest()
+
+
+@dataclass
+class _CachedLayout:
+    signature: str
+    positions: dict[str, tuple[float, float]]
+
+
+def _compute_layout(graph: "GraphData", previous: Optional[_CachedLayout]) -> dict[str, tuple[float, float]]:
+    time_budget = get_settings().layout_time_budget_ms / 1000
+    ids = [n.id for n in graph.nodes]
+    index = {node_id: i for i, node_id in enumerate(ids)}
+    edges = [(index[e.source], index[e.target], e.trust_level) for e in graph.edges
+             if e.source in index and e.target in index]
+    source = np.array([e[0] for e in edges], dtype=np.int64)
+    target = np.array([e[1] for e in edges], dtype=np.int64)
+    weights = np.array([max(e[2] or 1, 1) / 5 for e in edges], dtype=np.float64)
+
+    known = [] if previous is None else [i for i, node_id in enumerate(ids) if node_id in previous.positions]
+    changed = len(ids) - len(known)
+    if previous is not None and known and changed <= INCREMENTAL_MAX_CHANGE * len(ids):
+        # Seed from the previous layout; new nodes start at their known neighbors' centroid
+        pos = np.zeros((len(ids), 2))
+        placed = np.zeros(len(ids), dtype=bool)
+        for i in known:
+            pos[i] = np.array(previous.positions[ids[i]]) / PIXELS_PER_UNIT
+            placed[i] = True
+        rng = np.random.default_rng(len(ids))
+        for i in np.flatnonzero(~placed):
+            neighbors = np.concatenate([target[source == i], source[target == i]])
+            neighbors = neighbors[placed[neighbors]]
+            center = pos[neighbors].mean(axis=0) if len(neighbors) else np.zeros(2)
+            pos[i] = center + rng.normal(scale=0.5, size=2)
+        pos = force_layout(
+            len(ids), source, target, weights,
+            initial=pos, iterations=REFINE_ITERATIONS, temperature=0.5, time_budget=time_budget
+        )
+    else:
+        pos = force_layout(len(ids), source, target, weights, time_budget=time_budget)
+
+    # Center on the user so the client can render around the origin
+    users = [i for i, n in enumerate(graph.nodes) if n.degree == 0]
+    if users:
+        pos -= pos[users[0]]
+    pos *= PIXELS_PER_UNIT
+    return {node_id: (float(pos[i, 0]), float(pos[i, 1])) for i, node_id in enumerate(ids)}
+
+
+class LayoutCache:
+    """LRU of layouts keyed by owner and query shape, versioned by graph signature.
+
+    A shape can have variants (such as the graph at different dates). A
+    variant without a layout of its own is seeded from the shape's latest
+    layout, so scrubbing through dates refines positions instead of laying
+    out every date from scratch.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple, _CachedLayout] = OrderedDict()
+        # Shape -> key of the layout most recently computed for it
+        self._latest: dict[tuple, tuple] = {}
+
+    async def apply(self, shape: tuple, graph: "GraphData", variant: Hashable = None) -> "GraphData":
+        """Fill ``x``/``y`` on every node of ``graph`` and return it.
+
+        Graphs above ``layout_max_nodes`` are returned without positions.
+        """
+        if len(graph.nodes) > get_settings().layout_max_nodes:
+            return graph
+        key = (shape, variant)
+        signature = graph_signature(graph)
+        cached = self._entries.get(key)
+        if cached is None or cached.signature != signature:
+            previous = cached or self._entries.get(self._latest.get(shape))
+            positions = await asyncio.to_thread(_compute_layout, graph, previous)
+            cached = _CachedLayout(signature=signature, positions=positions)
+            self._entries[key] = cached
+            self._latest[shape] = key
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            if self._latest.get(evicted[0]) == evicted:
+                del self._latest[evicted[0]]
+
+        for node in graph.nodes:
+            node.x, node.y = cached.positions[node.id]
+        return graph
+
+
+_layout_cache: Optional[LayoutCache] = None
+
+
+def get_layout_cache() -> LayoutCache:
+    global _layout_cache
+    if _layout_cache is None:
+        _layout_cache = LayoutCache(get_settings().layout_cache_size)
+    return _layout_cache
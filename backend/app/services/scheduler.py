@@ -0,0 +1,197 @@
+"""
+Admission control in front of GraphService.
+
+Operations are split into two lanes, each with its own concurrency limit and
+bounded wait queue, so a burst of expensive traversals cannot take every pool
+connection and leave cheap lookups waiting behind them:
+
+    heavy   graph, second-degree connections, suggestions, timelines, deletions
+    light   person lookups, connections pages, other mutations
+
+When a lane's queue is full the request is rejected immediately with
+``Overloaded``, which the GraphQL layer turns into a 503 with ``Retry-After``.
+
+Identical read operations that are already running are coalesced: callers
+join the in-flight call (single-flight) instead of starting another one.
+Keys include a per-owner version that every mutation bumps, so a result
+computed before a write is never shared with a request that comes after it.
+
+Admission is per call; ``RequestContext.schedule`` makes the calls of one
+request take turns, so a request holds at most one slot per lane.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from ..config import get_settings
+
+HEAVY = "heavy"
+LIGHT = "light"
+# Weight of the newest sample in each lane's moving average duration
+DURATION_SMOOTHING = 0.1
+
+
+class Overloaded(Exception):
+    """Raised when a lane's wait queue is full."""
+
+    def __init__(self, lane: str, retry_after: int):
+        super().__init__(f"Server busy ({lane} operations), retry after {retry_after}s")
+        self.lane = lane
+        self.retry_after = retry_after
+
+
+class Lane:
+    """A concurrency limit with a bounded FIFO of waiters."""
+
+    def __init__(self, name: str, limit: int, queue_size: int):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.running = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.rejected = 0
+        self.coalesced = 0
+        self.avg_ms = 0.0
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue has likely drained (at least 1)."""
+        backlog = (self.running + self.waiting) / max(self.limit, 1)
+        return max(1, int(backlog * self.avg_ms / 1000 + 0.999))
+
+    async def acquire(self):
+        if self.running < self.limit and not self._waiters:
+            self.running += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.queue_size:
+            self.rejected += 1
+            raise Overloaded(self.name, self.retry_after())
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.cancelled():
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            else:
+                # The slot was handed over just before we were cancelled
+                self.release()
+            raise
+        self.admitted += 1
+
+    def release(self):
+        # Hand the slot straight to the next live waiter, keeping `running`
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.running -= 1
+
+    def record(self, duration_ms: float):
+        if self.avg_ms == 0.0:
+            self.avg_ms = duration_ms
+        else:
+            self.avg_ms += DURATION_SMOOTHING * (duration_ms - self.avg_ms)
+
+    def metrics(self) -> dict:
+        return {
+            "limit": self.limit,
+            "queue_size": self.queue_size,
+            "running": self.running,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "coalesced": self.coalesced,
+            "avg_ms": round(self.avg_ms, 1),
+        }
+
+
+class Scheduler:
+    """Heavy/light lanes plus single-flight coalescing of identical reads."""
+
+    def __init__(self, lanes: dict[str, Lane]):
+        self.lanes = lanes
+        self._versions: dict[str, int] = {}
+        self._inflight: dict[tuple, asyncio.Future] = {}
+
+    def version(self, owner: str) -> int:
+        """The owner's data version, bumped by every mutation."""
+        return self._versions.get(owner, 0)
+
+    def bump(self, owner: str):
+        """Mark an owner's data as changed; later reads won't join older flights."""
+        self._versions[owner] = self.version(owner) + 1
+
+    async def run(
+        self,
+        lane: str,
+        owner: str,
+        call: Callable[[], Awaitable[Any]],
+        key: Optional[Hashable] = None
+    ) -> Any:
+        """Run ``call`` once admitted to ``lane``.
+
+        With a ``key``, concurrent calls with the same key (for the same owner
+        and data version) share a single execution.
+        """
+        if key is None:
+            return await self._admit(self.lanes[lane], call)
+
+        flight_key = (owner, self.version(owner), key)
+        flight = self._inflight.get(flight_key)
+        if flight is not None:
+            self.lanes[lane].coalesced += 1
+            try:
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                if not flight.cancelled():
+                    raise
+            # The request that started the flight went away; run it ourselves
+            return await self.run(lane, owner, call, key)
+
+        flight = asyncio.ensure_future(self._admit(self.lanes[lane], call))
+        self._inflight[flight_key] = flight
+
+        def done(_):
+            if self._inflight.get(flight_key) is flight:
+                del self._inflight[flight_key]
+
+        flight.add_done_callback(done)
+        return await flight
+
+    async def _admit(self, lane: Lane, call: Callable[[], Awaitable[Any]]) -> Any:
+        await lane.acquire()
+        started_at = time.monotonic()
+        try:
+            return await call()
+        finally:
+            lane.record((time.monotonic() - started_at) * 1000)
+            lane.release()
+
+    def metrics(self) -> dict:
+        return {
+            "lanes": {name: lane.metrics() for name, lane in self.lanes.items()},
+            "inflight": len(self._inflight),
+        }
+
+
+_scheduler: Optional[Scheduler] = None
+
+
+def get_scheduler() -> Scheduler:
+    global _scheduler
+    if _scheduler is None:
+        settings = get_settings()
+        _scheduler = Scheduler({
+            HEAVY: Lane(HEAVY, settings.heavy_concurrency, settings.heavy_queue_size),
+            LIGHT: Lane(LIGHT, settings.light_concurrency, settings.light_queue_size),
+        })
+    return _scheduler
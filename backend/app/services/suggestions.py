@@ -0,0 +1,170 @@
+"""
+Ranking and caching for "people you may know" suggestions.
+
+Candidates are friends-of-friends aggregated once each in Cypher (mutual count
+and the sum of trust products over every connecting path). They are streamed
+into a bounded min-heap of size ``first`` so only the top results are ever
+held and ordered.
+
+Results are cached per (owner, person). Every entry records the people its
+result depends on (the person, their friends and every candidate), and
+mutations invalidate all entries that depend on a person they touched. The
+cache is per process, like the layout cache, so writes made by other workers
+or by the reset, seed and dedup commands are only picked up once an entry
+expires after ``suggestion_cache_ttl_seconds``.
+"""
+import heapq
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from ..config import get_settings
+from .dedup import normalize
+
+# Weights of the score components; trust_score is already ~1 per mutual friend
+TAG_WEIGHT = 1.0
+INTEREST_WEIGHT = 1.0
+# A path through two trust-5 relationships contributes 1.0 to trust_score
+MAX_PATH_TRUST = 25.0
+
+
+def _words(text: Optional[str]) -> set[str]:
+    return {w for w in normalize(text or "").split() if len(w) > 2}
+
+
+def _jaccard(a: set[str], b: set[str]) -> float:
+    union = len(a | b)
+    return len(a & b) / union if union else 0.0
+
+
+@dataclass(order=True)
+class ScoredCandidate:
+    score: float
+    person_id: str = field(compare=False)
+    record: dict = field(compare=False)
+    trust_score: float = field(compare=False)
+    tag_overlap: float = field(compare=False)
+    interest_overlap: float = field(compare=False)
+
+
+class SuggestionRanker:
+    """Scores candidates against one person's profile and keeps the top ``first``."""
+
+    def __init__(self, tags: Iterable[str], offers: Optional[str], seeks: Optional[str], first: int):
+        self.tags = {normalize(t) for t in tags or []}
+        self.offers = _words(offers)
+        self.seeks = _words(seeks)
+        self.first = first
+        self._heap: list[ScoredCandidate] = []
+
+    def push(self, person: dict, path_trust: float):
+        tag_overlap = _jaccard(self.tags, {normalize(t) for t in person.get("tags") or []})
+        # What they offer matches what this person seeks, or the other way round
+        interest_overlap = max(
+            _jaccard(self.seeks, _words(person.get("offers"))),
+            _jaccard(self.offers, _words(person.get("seeks")))
+        )
+        trust_score = (path_trust or 0) / MAX_PATH_TRUST
+        candidate = ScoredCandidate(
+            score=trust_score + TAG_WEIGHT * tag_overlap + INTEREST_WEIGHT * interest_overlap,
+            person_id=person["id"],
+            record=person,
+            trust_score=trust_score,
+            tag_overlap=tag_overlap,
+            interest_overlap=interest_overlap
+        )
+        if self.first < 1:
+            return
+        if len(self._heap) < self.first:
+            heapq.heappush(self._heap, candidate)
+        elif candidate > self._heap[0]:
+            heapq.heapreplace(self._heap, candidate)
+
+    def top(self) -> list[ScoredCandidate]:
+        """Best candidates first (ties broken by person id)."""
+        return sorted(self._heap, key=lambda c: (-c.score, c.person_id))
+
+
+@dataclass
+class _CachedSuggestions:
+    first: int
+    suggestions: list
+    depends_on: set[str]
+    expires_at: float
+
+
+class SuggestionCache:
+    """LRU of suggestions per (owner, person) with dependency-based invalidation
+    and a time to live."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple[str, str], _CachedSuggestions] = OrderedDict()
+        # (owner, person id) -> keys of entries that depend on that person
+        self._dependents: dict[tuple[str, str], set[tuple[str, str]]] = {}
+        # Bumped by every invalidation of an owner's entries
+        self._generations: dict[str, int] = {}
+
+    def generation(self, owner: str) -> int:
+        """Pass to ``put`` to discard a result if ``owner`` changes meanwhile."""
+        return self._generations.get(owner, 0)
+
+    def get(self, owner: str, person_id: str, first: int) -> Optional[list]:
+        key = (owner, person_id)
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            self._drop(key)
+            return None
+        if entry is None or entry.first < first:
+            return None
+        self._entries.move_to_end(key)
+        return entry.suggestions[:first]
+
+    def put(self, owner: str, person_id: str, first: int, suggestions: list,
+            depends_on: set[str], generation: int):
+        """Store a result unless something was invalidated while it was computed."""
+        if generation != self.generation(owner):
+            return
+        key = (owner, person_id)
+        self._drop(key)
+        self._entries[key] = _CachedSuggestions(
+            first, suggestions, depends_on | {person_id}, time.monotonic() + self.ttl
+        )
+        for dependency in self._entries[key].depends_on:
+            self._dependents.setdefault((owner, dependency), set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    def invalidate(self, owner: str, person_ids: Iterable[str]):
+        """Drop every entry whose result depends on any of ``person_ids``."""
+        self._generations[owner] = self.generation(owner) + 1
+        for person_id in person_ids:
+            for key in self._dependents.pop((owner, person_id), set()):
+                self._drop(key)
+
+    def _drop(self, key: tuple[str, str]):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        owner = key[0]
+        for dependency in entry.depends_on:
+            dependents = self._dependents.get((owner, dependency))
+            if dependents is not None:
+                dependents.discard(key)
+                if not dependents:
+                    del self._dependents[(owner, dependency)]
+
+
+_suggestion_cache: Optional[SuggestionCache] = None
+
+
+def get_suggestion_cache() -> SuggestionCache:
+    global _suggestion_cache
+    if _suggestion_cache is None:
+        settings = get_settings()
+        _suggestion_cache = SuggestionCache(
+            settings.suggestion_cache_size, settings.suggestion_cache_ttl_seconds
+        )
+    return _suggestion_cache
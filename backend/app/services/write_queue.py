@@ -0,0 +1,134 @@
+"""
+Write-behind stage that coalesces bursty updates to the same entity.
+
+Updates are held for a short window. Later updates to the same
+(statement, owner, id) replace earlier ones, and each window is flushed as one
+UNWIND per statement inside a single write transaction. Every caller awaits
+the flush, so the merged entity it gets back has already been committed
+(read-your-writes for the issuing request).
+
+Batches are written one at a time, in the order their windows closed, so a
+later update to an entity can never be overwritten by an earlier batch that
+is still being written (or retried after a deadlock).
+"""
+import asyncio
+from dataclasses import dataclass, field
+from typing import Optional
+
+from ..config import get_settings
+from ..database import get_session
+
+
+@dataclass
+class _PendingWrite:
+    row: dict
+    future: asyncio.Future
+
+
+@dataclass
+class _Batch:
+    # statement -> (owner, id) -> pending write
+    writes: dict[str, dict[tuple[str, str], _PendingWrite]] = field(default_factory=dict)
+    size: int = 0
+
+
+class WriteCoalescer:
+    """Merge updates to the same entity and flush them in batches."""
+
+    def __init__(self, window: float, max_batch: int):
+        self.window = window
+        self.max_batch = max_batch
+        self._batch = _Batch()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: set[asyncio.Task] = set()
+        # Each flush waits for this one, so batches commit in order
+        self._last_flush: Optional[asyncio.Task] = None
+
+    async def submit(self, statement: str, owner: str, entity_id: str, params: dict) -> Optional[dict]:
+        """Queue an update and wait for the record it produced once committed.
+
+        ``statement`` must UNWIND ``$rows`` and return ``owner`` and ``id``
+        columns so records can be routed back to their callers. Returns
+        ``None`` when the entity no longer exists.
+        """
+        key = (owner, entity_id)
+        writes = self._batch.writes.setdefault(statement, {})
+        row = {**params, "owner": owner, "id": entity_id}
+        pending = writes.get(key)
+        if pending:
+            # Last write wins: inputs are full replacements of the entity
+            pending.row = row
+        else:
+            pending = _PendingWrite(row=row, future=asyncio.get_running_loop().create_future())
+            writes[key] = pending
+            self._batch.size += 1
+
+        if self._batch.size >= self.max_batch:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._start_flush)
+
+        return await asyncio.shield(pending.future)
+
+    def _start_flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._batch = self._batch, _Batch()
+        if batch.size == 0:
+            return
+        task = asyncio.create_task(self._flush(batch, self._last_flush))
+        self._last_flush = task
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, batch: _Batch, previous: Optional[asyncio.Task]):
+        if previous is not None:
+            # Failures were already handed to that batch's callers
+            await asyncio.wait([previous])
+
+        async def write(tx):
+            results = {}
+            for statement, writes in batch.writes.items():
+                result = await tx.run(statement, rows=[w.row for w in writes.values()])
+                async for record in result:
+                    results.setdefault((statement, (record["owner"], record["id"])), record.data())
+            return results
+
+        try:
+            async with get_session() as session:
+                results = await session.execute_write(write)
+        except Exception as e:
+            for writes in batch.writes.values():
+                for pending in writes.values():
+                    if not pending.future.done():
+                        pending.future.set_exception(e)
+            return
+
+        for statement, writes in batch.writes.items():
+            for key, pending in writes.items():
+                if not pending.future.done():
+                    pending.future.set_result(results.get((statement, key)))
+
+    async def drain(self):
+        """Flush anything still queued and wait for in-flight flushes."""
+        self._start_flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+
+_coalescer: Optional[WriteCoalescer] = None
+
+
+def get_write_coalescer() -> Optional[WriteCoalescer]:
+    """Return the shared coalescer, or ``None`` when write-behind is disabled."""
+    global _coalescer
+    settings = get_settings()
+    if settings.write_coalesce_window_ms <= 0:
+        return None
+    if _coalescer is None:
+        _coalescer = WriteCoalescer(
+            window=settings.write_coalesce_window_ms / 1000,
+            max_batch=settings.write_coalesce_max_batch
+        )
+    return _coalescer
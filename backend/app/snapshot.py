@@ -0,0 +1,362 @@
+"""
+Memory-mapped binary snapshots of an owner's KNOWS graph.
+
+A snapshot is a directory of flat little-endian arrays plus a ``manifest.json``
+describing their dtypes and shapes, so every array can be opened with
+``numpy.memmap`` without loading it into the heap (and shared across worker
+processes through the page cache):
+
+    offsets          int64  (n + 1)     CSR offsets into neighbors
+    neighbors        int32  (2m)        CSR neighbor node indices
+    neighbor_trust   int8   (2m)        trust_level per CSR slot
+    edge_source      int32  (m)         one row per KNOWS relationship,
+    edge_target      int32  (m)         sorted by edge_since
+    edge_trust       int8   (m)
+    edge_since       int32  (m)         days since 1970-01-01, INT32_MIN if unknown
+    string_offsets   int64  (s + 1)     interned UTF-8 string table
+    string_data      uint8  (bytes)
+    node_id          int32  (n)         string index of each person id
+    node_name        int32  (n)         string index of each name
+    tag_names        int32  (t)         string index of each tag
+    tag_bits         uint64 (n, words)  bit j set if node has tag j
+
+Snapshots are written to ``<snapshot_dir>/<owner>/<timestamp>/`` and the
+newest one is recorded in ``<snapshot_dir>/<owner>/LATEST``.
+
+Because edges are sorted by ``since``, the graph as of any date is a prefix
+of the edge arrays, found with one binary search (``Snapshot.edges_as_of``).
+
+Run with:
+    python -m app.snapshot write [--owner OWNER] [--out DIR]
+    python -m app.snapshot info PATH [--as-of YYYY-MM-DD]
+    python -m app.snapshot diff OLD NEW
+"""
+import argparse
+import asyncio
+import json
+import os
+from datetime import date, datetime
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from .config import get_settings
+from .database import close_driver
+from .services.adjacency import Adjacency, GraphArrays, NO_DATE, build_csr, date_to_days, load_graph
+
+FORMAT_NAME = "bimoi-snapshot"
+FORMAT_VERSION = 2
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot directory is missing or has an unknown format."""
+
+
+class _StringTable:
+    """Interns strings and serializes them as offsets + UTF-8 bytes."""
+
+    def __init__(self):
+        self._index: dict[str, int] = {}
+        self._strings: list[str] = []
+
+    def intern(self, value: str) -> int:
+        index = self._index.get(value)
+        if index is None:
+            index = len(self._strings)
+            self._index[value] = index
+            self._strings.append(value)
+        return index
+
+    def arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        encoded = [s.encode("utf-8") for s in self._strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return offsets, data
+
+
+def _snapshot_arrays(graph: GraphArrays) -> dict[str, np.ndarray]:
+    strings = _StringTable()
+    node_id = np.fromiter((strings.intern(i) for i in graph.ids), dtype=np.int32, count=graph.num_nodes)
+    node_name = np.fromiter((strings.intern(n) for n in graph.names), dtype=np.int32, count=graph.num_nodes)
+
+    tag_index: dict[str, int] = {}
+    for node_tags in graph.tags:
+        for tag in node_tags:
+            tag_index.setdefault(tag, len(tag_index))
+    tag_names = np.fromiter((strings.intern(t) for t in tag_index), dtype=np.int32, count=len(tag_index))
+    words = max((len(tag_index) + 63) // 64, 1)
+    tag_bits = np.zeros((graph.num_nodes, words), dtype=np.uint64)
+    for i, node_tags in enumerate(graph.tags):
+        for tag in node_tags:
+            j = tag_index[tag]
+            tag_bits[i, j // 64] |= np.uint64(1) << np.uint64(j % 64)
+
+    adjacency = graph.csr()
+    string_offsets, string_data = strings.arrays()
+    by_since = np.argsort(graph.since, kind="stable")
+    return {
+        "offsets": adjacency.offsets,
+        "neighbors": adjacency.neighbors,
+        "neighbor_trust": adjacency.weights,
+        "edge_source": graph.source[by_since],
+        "edge_target": graph.target[by_since],
+        "edge_trust": graph.trust[by_since],
+        "edge_since": graph.since[by_since],
+        "string_offsets": string_offsets,
+        "string_data": string_data,
+        "node_id": node_id,
+        "node_name": node_name,
+        "tag_names": tag_names,
+        "tag_bits": tag_bits,
+    }
+
+
+def write_snapshot(graph: GraphArrays, root: Path, owner: str) -> Path:
+    """Write a snapshot of ``graph`` under ``root/owner`` and return its path.
+
+    Files are written to a temporary directory that is renamed into place, so
+    readers never observe a partially written snapshot.
+    """
+    owner_dir = root / owner
+    owner_dir.mkdir(parents=True, exist_ok=True)
+    created_at = datetime.now()
+    name = created_at.strftime("%Y%m%dT%H%M%S%f")
+    tmp_dir = owner_dir / f".tmp-{name}"
+    tmp_dir.mkdir()
+
+    manifest = {
+        "format": FORMAT_NAME,
+        "version": FORMAT_VERSION,
+        "owner": owner,
+        "created_at": created_at.isoformat(),
+        "num_nodes": graph.num_nodes,
+        "num_edges": graph.num_edges,
+        "arrays": {},
+    }
+    for key, array in _snapshot_arrays(graph).items():
+        array = np.ascontiguousarray(array, dtype=array.dtype.newbyteorder("<"))
+        array.tofile(tmp_dir / f"{key}.bin")
+        manifest["arrays"][key] = {"dtype": array.dtype.str, "shape": list(array.shape)}
+    manifest["num_tags"] = manifest["arrays"]["tag_names"]["shape"][0]
+    (tmp_dir / "manifest.json").write_text(json.dumps(manifest, indent=2))
+
+    path = owner_dir / name
+    os.rename(tmp_dir, path)
+    (owner_dir / "LATEST").write_text(name)
+    return path
+
+
+class Snapshot:
+    """A read-only, memory-mapped snapshot."""
+
+    def __init__(self, path: Path):
+        path = Path(path)
+        if (path / "LATEST").exists():
+            path = path / (path / "LATEST").read_text().strip()
+        manifest_path = path / "manifest.json"
+        if not manifest_path.exists():
+            raise SnapshotError(f"No snapshot manifest in {path}")
+        self.path = path
+        self.manifest = json.loads(manifest_path.read_text())
+        if self.manifest.get("format") != FORMAT_NAME:
+            raise SnapshotError(f"{path} is not a {FORMAT_NAME} directory")
+        if self.manifest.get("version") != FORMAT_VERSION:
+            raise SnapshotError(
+                f"Unsupported snapshot version {self.manifest.get('version')} "
+                f"(expected {FORMAT_VERSION})"
+            )
+        self._arrays: dict[str, np.ndarray] = {}
+        self._strings: Optional[list[str]] = None
+        self._index: Optional[dict[str, int]] = None
+
+    @classmethod
+    def open(cls, path) -> "Snapshot":
+        return cls(Path(path))
+
+    def array(self, key: str) -> np.ndarray:
+        """Memory-map one of the snapshot arrays."""
+        if key not in self._arrays:
+            spec = self.manifest["arrays"][key]
+            shape = tuple(spec["shape"])
+            if int(np.prod(shape)) == 0:
+                # mmap cannot map empty files
+                self._arrays[key] = np.empty(shape, dtype=spec["dtype"])
+            else:
+                self._arrays[key] = np.memmap(
+                    self.path / f"{key}.bin", dtype=spec["dtype"], mode="r", shape=shape
+                )
+        return self._arrays[key]
+
+    @property
+    def num_nodes(self) -> int:
+        return self.manifest["num_nodes"]
+
+    @property
+    def num_edges(self) -> int:
+        return self.manifest["num_edges"]
+
+    def string(self, index: int) -> str:
+        offsets = self.array("string_offsets")
+        data = self.array("string_data")
+        return bytes(data[offsets[index]:offsets[index + 1]]).decode("utf-8")
+
+    def strings(self) -> list[str]:
+        """Decode the whole string table (cached)."""
+        if self._strings is None:
+            offsets = self.array("string_offsets").tolist()
+            data = self.array("string_data").tobytes()
+            self._strings = [
+                data[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])
+            ]
+        return self._strings
+
+    def person_id(self, node: int) -> str:
+        return self.string(int(self.array("node_id")[node]))
+
+    def name(self, node: int) -> str:
+        return self.string(int(self.array("node_name")[node]))
+
+    def ids(self) -> list[str]:
+        strings = self.strings()
+        return [strings[i] for i in self.array("node_id").tolist()]
+
+    def names(self) -> list[str]:
+        strings = self.strings()
+        return [strings[i] for i in self.array("node_name").tolist()]
+
+    def index(self) -> dict[str, int]:
+        """Map person ids to node indices."""
+        if self._index is None:
+            self._index = {person_id: i for i, person_id in enumerate(self.ids())}
+        return self._index
+
+    def neighbors_of(self, node: int) -> np.ndarray:
+        offsets = self.array("offsets")
+        return self.array("neighbors")[offsets[node]:offsets[node + 1]]
+
+    def tags_of(self, node: int) -> list[str]:
+        bits = self.array("tag_bits")[node]
+        tag_names = self.array("tag_names")
+        return [
+            self.string(int(tag_names[j]))
+            for j in range(len(tag_names))
+            if int(bits[j // 64]) >> (j % 64) & 1
+        ]
+
+    def edges_as_of(self, as_of: date) -> slice:
+        """Slice of the edge arrays for relationships with ``since <= as_of``.
+
+        Relationships without a ``since`` date are excluded.
+        """
+        since = self.array("edge_since")
+        start = int(np.searchsorted(since, NO_DATE, side="right"))
+        end = int(np.searchsorted(since, date_to_days(as_of), side="right"))
+        return slice(start, max(start, end))
+
+    def csr_as_of(self, as_of: date) -> Adjacency:
+        """Build the CSR adjacency of the graph as it was on ``as_of``."""
+        edges = self.edges_as_of(as_of)
+        return build_csr(
+            self.num_nodes,
+            np.asarray(self.array("edge_source")[edges]),
+            np.asarray(self.array("edge_target")[edges]),
+            np.asarray(self.array("edge_trust")[edges])
+        )
+
+    def timeline(self) -> list[tuple[date, int, int]]:
+        """Return (month, new relationships, running total) for dated edges."""
+        since = self.array("edge_since")
+        dated = np.asarray(since[int(np.searchsorted(since, NO_DATE, side="right")):])
+        months, counts = np.unique(
+            dated.astype("datetime64[D]").astype("datetime64[M]"), return_counts=True
+        )
+        totals = np.cumsum(counts)
+        return [
+            (month.astype("datetime64[D]").item(), int(count), int(total))
+            for month, count, total in zip(months, counts, totals)
+        ]
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot) -> dict:
+    """Compare two snapshots by person id and relationship endpoints."""
+    old_ids, new_ids = old.ids(), new.ids()
+    universe = {person_id: i for i, person_id in enumerate(sorted(set(old_ids) | set(new_ids)))}
+    n = len(universe)
+
+    def edge_keys(snapshot: Snapshot, ids: list[str]) -> tuple[np.ndarray, np.ndarray]:
+        to_universe = np.fromiter((universe[i] for i in ids), dtype=np.int64, count=len(ids))
+        a = to_universe[snapshot.array("edge_source")]
+        b = to_universe[snapshot.array("edge_target")]
+        keys = np.minimum(a, b) * n + np.maximum(a, b)
+        order = np.argsort(keys, kind="stable")
+        return keys[order], np.asarray(snapshot.array("edge_trust"))[order]
+
+    old_keys, old_trust = edge_keys(old, old_ids)
+    new_keys, new_trust = edge_keys(new, new_ids)
+    common, old_pos, new_pos = np.intersect1d(old_keys, new_keys, return_indices=True)
+
+    old_index, new_index = old.index(), new.index()
+    old_names, new_names = old.names(), new.names()
+    renamed = [
+        person_id for person_id in old_index.keys() & new_index.keys()
+        if old_names[old_index[person_id]] != new_names[new_index[person_id]]
+    ]
+    return {
+        "nodes_added": len(new_index.keys() - old_index.keys()),
+        "nodes_removed": len(old_index.keys() - new_index.keys()),
+        "nodes_renamed": len(renamed),
+        "edges_added": int(len(np.setdiff1d(new_keys, old_keys))),
+        "edges_removed": int(len(np.setdiff1d(old_keys, new_keys))),
+        "trust_changed": int(np.count_nonzero(old_trust[old_pos] != new_trust[new_pos])),
+        "edges_unchanged": int(len(common)),
+    }
+
+
+async def snapshot_owner(owner: str, root: Path) -> Path:
+    graph = await load_graph(owner)
+    return write_snapshot(graph, root, owner)
+
+
+def main():
+    settings = get_settings()
+    parser = argparse.ArgumentParser(prog="python -m app.snapshot", description=__doc__.split("\n")[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    write = commands.add_parser("write", help="snapshot an owner's graph from Neo4j")
+    write.add_argument("--owner", default=settings.default_owner)
+    write.add_argument("--out", default=settings.snapshot_dir)
+
+    info = commands.add_parser("info", help="describe a snapshot")
+    info.add_argument("path")
+    info.add_argument("--as-of", type=date.fromisoformat, help="count relationships up to this date")
+
+    diff = commands.add_parser("diff", help="compare two snapshots")
+    diff.add_argument("old")
+    diff.add_argument("new")
+
+    args = parser.parse_args()
+    if args.command == "write":
+        async def run():
+            try:
+                return await snapshot_owner(args.owner, Path(args.out))
+            finally:
+                await close_driver()
+        path = asyncio.run(run())
+        snapshot = Snapshot.open(path)
+        print(f"✓ Wrote {snapshot.num_nodes} people and {snapshot.num_edges} relationships to {path}")
+    elif args.command == "info":
+        snapshot = Snapshot.open(args.path)
+        manifest = {k: v for k, v in snapshot.manifest.items() if k != "arrays"}
+        if args.as_of:
+            edges = snapshot.edges_as_of(args.as_of)
+            manifest["as_of"] = args.as_of.isoformat()
+            manifest["num_edges_as_of"] = edges.stop - edges.start
+        print(json.dumps({"path": str(snapshot.path), **manifest}, indent=2))
+    elif args.command == "diff":
+        print(json.dumps(diff_snapshots(Snapshot.open(args.old), Snapshot.open(args.new)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
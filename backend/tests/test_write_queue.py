@@ -0,0 +1,88 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from app.services import write_queue
+from app.services.write_queue import WriteCoalescer
+
+STATEMENT = "UNWIND $rows AS row SET ..."
+
+
+class FakeRecord(dict):
+    def data(self) -> dict:
+        return dict(self)
+
+
+class FakeResult:
+    def __init__(self, records: list[FakeRecord]):
+        self._records = records
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for record in self._records:
+            yield record
+
+
+class FakeDatabase:
+    """Applies UNWIND rows to a dict; the first write is slow."""
+
+    def __init__(self, first_delay: float):
+        self.values: dict[str, int] = {}
+        self.delays = [first_delay]
+
+    async def run(self, statement: str, rows: list[dict]) -> FakeResult:
+        await asyncio.sleep(self.delays.pop(0) if self.delays else 0)
+        for row in rows:
+            self.values[row["id"]] = row["value"]
+        return FakeResult([FakeRecord(row) for row in rows])
+
+    async def execute_write(self, work):
+        return await work(self)
+
+    @asynccontextmanager
+    async def session(self):
+        yield self
+
+
+def test_batches_commit_in_order(monkeypatch):
+    database = FakeDatabase(first_delay=0.05)
+    monkeypatch.setattr(write_queue, "get_session", database.session)
+
+    async def run():
+        coalescer = WriteCoalescer(window=0.001, max_batch=100)
+        first = asyncio.create_task(coalescer.submit(STATEMENT, "o", "x", {"value": 1}))
+        # Let the first window close so its slow flush is in flight
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(coalescer.submit(STATEMENT, "o", "x", {"value": 2}))
+        await asyncio.gather(first, second)
+        await coalescer.drain()
+
+    asyncio.run(run())
+    assert database.values["x"] == 2
+
+
+def test_failed_batch_does_not_block_the_next(monkeypatch):
+    database = FakeDatabase(first_delay=0)
+    calls = []
+
+    @asynccontextmanager
+    async def session():
+        calls.append(None)
+        if len(calls) == 1:
+            raise RuntimeError("unavailable")
+        yield database
+
+    monkeypatch.setattr(write_queue, "get_session", session)
+
+    async def run():
+        coalescer = WriteCoalescer(window=0.001, max_batch=100)
+        first = asyncio.create_task(coalescer.submit(STATEMENT, "o", "x", {"value": 1}))
+        await asyncio.sleep(0.01)
+        second = await coalescer.submit(STATEMENT, "o", "x", {"value": 2})
+        return await asyncio.gather(first, return_exceptions=True), second
+
+    (first,), second = asyncio.run(run())
+    assert isinstance(first, RuntimeError)
+    assert second["value"] == 2
+    assert database.values["x"] == 2
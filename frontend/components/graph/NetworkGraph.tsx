@@ -20,6 +20,8 @@ interface GraphNode {
   tags: string[];
   isUser: boolean;
   degree: number;
+  x?: number | null;
+  y?: number | null;
 }
 
 interface GraphEdge {
@@ -165,7 +167,10 @@ export function NetworkGraph({
   );
 
   const graphData = {
-    nodes: nodes.map((n) => ({ ...n })),
+    // Start from the server-computed layout when present
+    nodes: nodes.map(({ x, y, ...n }) =>
+      x != null && y != null ? { ...n, x, y } : { ...n }
+    ),
     links: edges.map((e) => ({
       ...e,
       source: e.source,
@@ -54,6 +54,8 @@ export const GET_GRAPH = gql`
         tags
         isUser
         degree
+        x
+        y
       }
       edges {
         id